@@ -0,0 +1,246 @@
+"""Process-wide Google Calendar credentials and service cache.
+
+Credentials are parsed from the token file once and reused until the file
+changes (mtime), e.g. after the OAuth callback saves a new token. A background
+thread refreshes the access token `calendar_refresh_margin_s` before it
+expires, so requests never wait on a token refresh unless the refresher fell
+behind.
+
+googleapiclient services (and the httplib2 transport under them) aren't
+thread-safe, so each thread gets its own, built once from a discovery document
+parsed once per process; its keep-alive connection is then reused for every
+call that thread makes. Services are rebuilt only when the credentials object
+is replaced.
+
+Every blocking call to Google goes through `call`, which runs it on a small
+dedicated thread pool (`calendar_workers`, so at most that many services and
+connections exist) and gives up after `calendar_call_timeout_s`; the event
+loop and the shared request threadpool never wait on Google.
+
+With `calendar_backend = "fake"` everything is served by the in-memory
+stand-in in app/calendar_fake.py instead -- no token, no network.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+from app import metrics
+from app.config import settings
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+RETRY_AFTER_ERROR_S = 60
+BATCH_LIMIT = 50  # requests the Calendar API accepts in one batch call
+
+class CalendarClient:
+    def __init__(self, token_path: str):
+        self.token_path = Path(token_path)
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.creds: Optional["Credentials"] = None
+        self.mtime = None
+        self.generation = 0          # bumped whenever self.creds is replaced
+        self.local = threading.local()
+        self.document = None
+        self.transport = None        # google.auth Request for token refreshes, one pooled session
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.fake = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    # --- credentials ---
+
+    def credentials(self) -> Optional["Credentials"]:
+        """Current valid credentials, or None if not connected"""
+        creds = self._load()
+        if creds and creds.expired and creds.refresh_token:
+            self.refresh()  # the background refresher fell behind
+        return creds if creds and creds.valid else None
+
+    def _load(self):
+        try:
+            mtime = self.token_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self.lock:
+            if mtime == self.mtime:
+                metrics.inc("calendar.credentials.hits")
+                return self.creds
+            self.creds = None
+            if mtime is not None:
+                from google.oauth2.credentials import Credentials
+                with open(self.token_path) as f:
+                    self.creds = Credentials.from_authorized_user_info(json.load(f), SCOPES)
+            self.mtime = mtime
+            self.generation += 1
+            metrics.inc("calendar.credentials.loads")
+            return self.creds
+
+    def save(self, creds: "Credentials"):
+        """Persist credentials and make them current without a reload"""
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.token_path, 'w') as f:
+            f.write(creds.to_json())
+        with self.lock:
+            if creds is not self.creds:
+                self.creds = creds
+                self.generation += 1
+            self.mtime = self.token_path.stat().st_mtime_ns
+
+    def refresh(self) -> bool:
+        """Refresh the access token in place; concurrent callers wait for the one refresh"""
+        with self.refresh_lock:
+            creds = self.creds
+            if not creds or not creds.refresh_token:
+                return False
+            if creds.valid and not self._expiring(creds):
+                return True  # someone else just refreshed it
+            from google.auth.transport.requests import Request
+            if self.transport is None:
+                self.transport = Request()
+            start = time.perf_counter()
+            try:
+                creds.refresh(self.transport)
+            except Exception:
+                metrics.inc("calendar.credentials.refresh_errors")
+                logger.exception("calendar token refresh failed")
+                return False
+            metrics.inc("calendar.credentials.refreshes")
+            metrics.observe("calendar.credentials.refresh_ms", (time.perf_counter() - start) * 1000)
+            self.save(creds)
+            return True
+
+    def _expiring(self, creds) -> bool:
+        margin = timedelta(seconds=settings.calendar_refresh_margin_s)
+        return creds.expiry is not None and creds.expiry - margin <= datetime.utcnow()
+
+    # --- background refresh ---
+
+    def start(self):
+        if settings.calendar_backend != "google" or self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="calendar-token-refresh", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout=5)
+        self.thread = None
+
+    def _run(self):
+        while not self.stopping.is_set():
+            wait = RETRY_AFTER_ERROR_S
+            try:
+                creds = self._load()
+                if creds and creds.refresh_token:
+                    if self._expiring(creds) and not self.refresh():
+                        wait = RETRY_AFTER_ERROR_S
+                    elif creds.expiry is not None:
+                        due = creds.expiry - timedelta(seconds=settings.calendar_refresh_margin_s)
+                        wait = max(1.0, (due - datetime.utcnow()).total_seconds())
+            except Exception:
+                logger.exception("calendar refresher")
+            self.stopping.wait(wait)
+
+    # --- I/O pool ---
+
+    async def call(self, fn, *args, timeout: Optional[float] = None):
+        """Run blocking calendar I/O fn(*args) on the calendar pool; raises asyncio.TimeoutError
+        after `calendar_call_timeout_s` (the worker finishes in the background, bounded by the
+        socket timeout)"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(settings.calendar_workers, thread_name_prefix="calendar")
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        try:
+            return await asyncio.wait_for(future, timeout or settings.calendar_call_timeout_s)
+        except asyncio.TimeoutError:
+            metrics.inc("calendar.calls.timeouts")
+            raise
+        except Exception:
+            metrics.inc("calendar.calls.errors")
+            raise
+        finally:
+            metrics.inc("calendar.calls")
+            metrics.observe("calendar.calls.ms", (time.perf_counter() - start) * 1000)
+
+    # --- service ---
+
+    def service(self):
+        """This thread's Calendar service, or None if not connected"""
+        if settings.calendar_backend == "fake":
+            return self.fake_service()
+        creds = self.credentials()
+        if creds is None:
+            return None
+        local = self.local
+        if getattr(local, "generation", None) == self.generation:
+            metrics.inc("calendar.service.hits")
+            return local.service
+        local.service = self._build(creds)
+        local.generation = self.generation
+        metrics.inc("calendar.service.builds")
+        return local.service
+
+    def _build(self, creds):
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.discovery import build_from_document
+        if self.document is None:
+            from googleapiclient.discovery_cache import get_static_doc
+            self.document = json.loads(get_static_doc('calendar', 'v3'))
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=settings.calendar_timeout_s))
+        return build_from_document(self.document, http=http)
+
+    def fake_service(self):
+        if self.fake is None:
+            from app.calendar_fake import FakeCalendarService
+            self.fake = FakeCalendarService()
+        return self.fake
+
+    def connected(self) -> bool:
+        return settings.calendar_backend == "fake" or self.credentials() is not None
+
+def execute_batch(service, requests: list) -> list:
+    """Send API requests through the batch endpoint, BATCH_LIMIT per HTTP call.
+
+    Returns (response, exception) for each request, in order. A batch call that
+    fails as a whole (network, auth) fails every request in it, not the others.
+    """
+    results = [None] * len(requests)
+    def done(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+    for start in range(0, len(requests), BATCH_LIMIT):
+        chunk = range(start, min(start + BATCH_LIMIT, len(requests)))
+        batch = service.new_batch_http_request(callback=done)
+        for i in chunk:
+            batch.add(requests[i], request_id=str(i))
+        metrics.inc("calendar.batch.calls")
+        try:
+            batch.execute()
+        except Exception as e:
+            metrics.inc("calendar.batch.errors")
+            logger.warning("calendar batch call failed: %s", e)
+            for i in chunk:
+                if results[i] is None:
+                    results[i] = (None, e)
+    metrics.inc("calendar.batch.items", len(requests))
+    return results
+
+calendar_client = CalendarClient(settings.google_token_path)
@@ -0,0 +1,152 @@
+"""In-memory stand-in for the Google Calendar v3 service.
+
+Enabled with `calendar_backend = "fake"` (CALENDAR_BACKEND=fake). It mimics the
+slice of `service.events()` the app uses -- list, insert, delete, each
+returning a request with `.execute()` -- closely enough to exercise the routers,
+partials and the mirror sync without a token or network access:
+
+- every change gets a sequence number and a sync token is just the sequence a
+  list call saw, so `list(syncToken=...)` returns what changed since, deleted
+  events included as `status: cancelled` tombstones;
+- `invalidate_sync_tokens()` makes every outstanding token answer 410 Gone,
+  like Google does when it wants a full resync;
+- results are paged by `maxResults` with `pageToken`;
+- `new_batch_http_request()` runs its requests one by one and reports each
+  result to the callback, rejecting more than BATCH_LIMIT like the real
+  endpoint (`batches` counts the batch calls made).
+
+Events live in a dict for the life of the process; every calendarId shares it.
+"""
+import itertools
+import threading
+from datetime import datetime
+
+def _http_error(status: int, message: str):
+    import httplib2
+    from googleapiclient.errors import HttpError
+    return HttpError(httplib2.Response({"status": status}), f'{{"error": {{"code": {status}, "message": "{message}"}}}}'.encode())
+
+def _start(event: dict) -> datetime:
+    from app.calendar_sync import parse_time
+    return parse_time(event["start"])[0]
+
+def _instant(value: str) -> datetime:
+    from app.calendar_sync import parse_time
+    return parse_time({"dateTime": value})[0]
+
+class FakeRequest:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self, **kw):
+        return self.fn()
+
+class FakeBatch:
+    def __init__(self, service: "FakeCalendarService", callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request, callback or self.callback, request_id or str(len(self.requests))))
+
+    def execute(self, **kw):
+        from googleapiclient.errors import HttpError
+        from app.calendar_client import BATCH_LIMIT
+        if len(self.requests) > BATCH_LIMIT:
+            raise _http_error(400, f"Too many requests in batch: {len(self.requests)} > {BATCH_LIMIT}")
+        with self.service.lock:
+            self.service.batches += 1
+        for request, callback, request_id in self.requests:
+            response, exception = None, None
+            try:
+                response = request.execute()
+            except HttpError as e:
+                exception = e
+            if callback is not None:
+                callback(request_id, response, exception)
+
+class FakeEvents:
+    def __init__(self, service: "FakeCalendarService"):
+        self.service = service
+
+    def list(self, calendarId="primary", timeMin=None, timeMax=None, maxResults=250, singleEvents=True,
+             orderBy=None, syncToken=None, pageToken=None, showDeleted=False, **kw):
+        def run():
+            service = self.service
+            with service.lock:
+                if syncToken is not None:
+                    if timeMin or timeMax or orderBy:
+                        raise _http_error(400, "syncToken cannot be combined with timeMin, timeMax or orderBy")
+                    since = int(syncToken)
+                    if since < service.oldest_token:
+                        raise _http_error(410, "Sync token is no longer valid, a full sync is required.")
+                    items = [dict(e) for id, e in service.store.items() if service.changed[id] > since]
+                else:
+                    items = [dict(e) for e in service.store.values() if showDeleted or e.get("status") != "cancelled"]
+                token = str(service.seq)
+            if timeMin:
+                items = [e for e in items if "start" in e and _start(e) >= _instant(timeMin)]
+            if timeMax:
+                items = [e for e in items if "start" in e and _start(e) < _instant(timeMax)]
+            if orderBy == "startTime":
+                items.sort(key=_start)
+            offset = int(pageToken or 0)
+            result = {"kind": "calendar#events", "items": items[offset:offset + maxResults]}
+            if offset + maxResults < len(items):
+                result["nextPageToken"] = str(offset + maxResults)
+            else:
+                result["nextSyncToken"] = token
+            return result
+        return FakeRequest(run)
+
+    def insert(self, calendarId="primary", body=None, **kw):
+        def run():
+            service = self.service
+            event = {k: v for k, v in (body or {}).items() if v is not None}
+            with service.lock:
+                event["id"] = f"fake{next(service.ids)}"
+                event["status"] = "confirmed"
+                event["htmlLink"] = f"https://calendar.example/event?eid={event['id']}"
+                service.put(event)
+            return dict(event)
+        return FakeRequest(run)
+
+    def delete(self, calendarId="primary", eventId=None, **kw):
+        def run():
+            service = self.service
+            with service.lock:
+                event = service.store.get(eventId)
+                if event is None:
+                    raise _http_error(404, f"Not Found: {eventId}")
+                if event.get("status") == "cancelled":
+                    raise _http_error(410, "Resource has been deleted")
+                service.put({"id": eventId, "status": "cancelled"})
+            return ""
+        return FakeRequest(run)
+
+class FakeCalendarService:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.store: dict = {}    # id -> event, or a cancelled tombstone
+        self.changed: dict = {}  # id -> sequence number of its last change
+        self.seq = 0
+        self.oldest_token = 0
+        self.ids = itertools.count(1)
+        self.batches = 0
+
+    def put(self, event: dict):
+        """Record a change; call with the lock held"""
+        self.seq += 1
+        self.store[event["id"]] = event
+        self.changed[event["id"]] = self.seq
+
+    def invalidate_sync_tokens(self):
+        with self.lock:
+            self.oldest_token = self.seq + 1
+
+    def events(self):
+        return FakeEvents(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
@@ -0,0 +1,210 @@
+"""Local mirror of the Google Calendar, kept current with incremental sync.
+
+Events live in the `calendarevent` table and every read (the calendar
+partials, GET /api/calendar/events) is a date-range query against it, so
+dashboard latency no longer depends on Google. A background thread calls
+`sync` every `calendar_sync_interval_s`: with a stored syncToken it fetches
+only what changed since the last sync (cancelled events arrive as tombstones
+and are deleted); without one, or when Google answers 410 Gone because the
+token was invalidated, it does a full resync that replaces the calendar's
+rows in one transaction. create/delete write through to the mirror as soon as
+Google accepts them, so the next read doesn't wait for the loop.
+
+All times are stored as naive UTC (`start_at`, `end_at`) next to the value
+Google sent (`start`, `end`), which is what the UI formats.
+"""
+import logging
+import threading
+from datetime import date, datetime, time, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from app import metrics
+from app.calendar_client import calendar_client
+from app.config import settings
+from app.database import get_engine, get_read_engine
+from app.models import CalendarEvent, CalendarSyncState
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_ID = "primary"
+PAGE_SIZE = 2500  # the API maximum
+
+def parse_time(value: dict) -> tuple[datetime, bool]:
+    """A Google start/end object as (naive UTC datetime, all_day)"""
+    if value.get("dateTime"):
+        dt = datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            try:
+                dt = dt.replace(tzinfo=ZoneInfo(value.get("timeZone") or "UTC"))
+            except ZoneInfoNotFoundError:
+                dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc).replace(tzinfo=None), False
+    return datetime.combine(date.fromisoformat(value["date"]), time.min), True
+
+def _row(event: dict, calendar_id: str) -> CalendarEvent:
+    start, end = event.get("start", {}), event.get("end") or event.get("start", {})
+    start_at, all_day = parse_time(start)
+    end_at, _ = parse_time(end)
+    return CalendarEvent(
+        id=event["id"],
+        calendar_id=calendar_id,
+        summary=event.get("summary"),
+        description=event.get("description"),
+        location=event.get("location"),
+        start=start.get("dateTime") or start.get("date"),
+        end=end.get("dateTime") or end.get("date"),
+        start_at=start_at,
+        end_at=max(end_at, start_at),
+        all_day=all_day,
+        html_link=event.get("htmlLink"),
+    )
+
+def store(session: Session, events, calendar_id: str = CALENDAR_ID):
+    """Upsert a batch of Google events into the mirror, deleting cancelled ones; the caller commits"""
+    for event in events:
+        if event.get("status") == "cancelled":
+            row = session.get(CalendarEvent, event["id"])
+            if row is not None:
+                session.delete(row)
+        else:
+            session.merge(_row(event, calendar_id))
+
+def write_through(events, calendar_id: str = CALENDAR_ID):
+    """Apply events Google just accepted, so reads see them before the next sync"""
+    with Session(get_engine()) as session:
+        store(session, events, calendar_id)
+        session.commit()
+
+def events_between(session: Session, start: datetime, end: datetime, calendar_id: str = CALENDAR_ID, limit: Optional[int] = None):
+    """Mirrored events overlapping [start, end) (naive UTC), ordered by start"""
+    query = (
+        select(CalendarEvent)
+        .where(CalendarEvent.calendar_id == calendar_id)
+        .where(CalendarEvent.start_at < end)
+        .where(CalendarEvent.end_at > start)
+        .order_by(CalendarEvent.start_at)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return session.exec(query).all()
+
+# --- Sync ---
+
+_lock = threading.Lock()
+_synced: set = set()  # calendars that have a sync token in the database
+
+def _fetch(service, calendar_id: str, token: Optional[str]):
+    """Every page of one list call; returns (events, nextSyncToken)"""
+    events, page = [], None
+    while True:
+        params = {"calendarId": calendar_id, "singleEvents": True, "maxResults": PAGE_SIZE}
+        if token:
+            params["syncToken"] = token
+        if page:
+            params["pageToken"] = page
+        result = service.events().list(**params).execute()
+        events.extend(result.get("items", []))
+        page = result.get("nextPageToken")
+        if not page:
+            return events, result.get("nextSyncToken")
+
+def sync(calendar_id: str = CALENDAR_ID) -> Optional[dict]:
+    """Bring the mirror up to date; returns None when the calendar isn't connected"""
+    service = calendar_client.service()
+    if service is None:
+        return None
+    from googleapiclient.errors import HttpError
+    with _lock:
+        with Session(get_read_engine()) as session:
+            state = session.get(CalendarSyncState, calendar_id)
+            token = state.sync_token if state else None
+        full = token is None
+        try:
+            events, token = _fetch(service, calendar_id, token)
+        except HttpError as e:
+            if full or e.resp.status != 410:
+                raise
+            metrics.inc("calendar.sync.token_invalidated")
+            full = True
+            events, token = _fetch(service, calendar_id, None)
+        # the single writer connection is only taken once Google has answered
+        now = datetime.utcnow()
+        with Session(get_engine()) as session:
+            if full:
+                session.execute(delete(CalendarEvent).where(CalendarEvent.calendar_id == calendar_id))
+            store(session, events, calendar_id)
+            state = session.get(CalendarSyncState, calendar_id) or CalendarSyncState(calendar_id=calendar_id)
+            state.sync_token = token
+            state.last_sync_at = now
+            if full:
+                state.last_full_sync_at = now
+            session.add(state)
+            session.commit()
+        _synced.add(calendar_id)
+    metrics.inc("calendar.sync.full" if full else "calendar.sync.incremental")
+    metrics.inc("calendar.sync.changes", len(events))
+    return {"full": full, "changes": len(events)}
+
+def ensure_synced(calendar_id: str = CALENDAR_ID):
+    """Fill the mirror inline if it has never been synced (first read after connecting)"""
+    if calendar_id in _synced:
+        return
+    with Session(get_read_engine()) as session:
+        state = session.get(CalendarSyncState, calendar_id)
+    if state is not None and state.sync_token is not None:
+        _synced.add(calendar_id)
+    else:
+        sync(calendar_id)
+
+def reset(calendar_id: str = CALENDAR_ID):
+    """Forget the sync token and run a full sync soon (e.g. after connecting another account)"""
+    with _lock:
+        with Session(get_engine()) as session:
+            state = session.get(CalendarSyncState, calendar_id)
+            if state is not None:
+                state.sync_token = None
+                session.add(state)
+                session.commit()
+        _synced.discard(calendar_id)
+    calendar_sync.wake()
+
+class CalendarSync:
+    """Background thread running `sync` every `calendar_sync_interval_s`"""
+
+    def __init__(self):
+        self.stopping = threading.Event()
+        self.waking = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.thread is not None or settings.calendar_sync_interval_s <= 0:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="calendar-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.waking.set()
+        self.thread.join(timeout=5)
+        self.thread = None
+
+    def wake(self):
+        """Sync now instead of at the next interval"""
+        self.waking.set()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                sync()
+            except Exception:
+                metrics.inc("calendar.sync.errors")
+                logger.exception("calendar sync failed")
+            self.waking.wait(settings.calendar_sync_interval_s)
+            self.waking.clear()
+
+calendar_sync = CalendarSync()
@@ -1,7 +1,58 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_path: str = "/data/life.db"
     api_key: str = "dev-secret-key"
 
+    # SQLite storage profile, applied to every connection on connect
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size: int = -16000  # negative = KiB, so ~16 MB per connection
+    sqlite_mmap_size: int = 128 * 1024 * 1024
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_reader_pool_size: int = 4
+    sqlite_reader_max_overflow: int = 8
+
+    # Group commit for log inserts (see app/writequeue.py)
+    write_behind: bool = False
+    write_batch_max_rows: int = 64
+    write_batch_max_delay_ms: float = 5.0
+
+    # Rows per executemany batch / transaction for bulk imports
+    import_batch_rows: int = 2000
+
+    # Weight trend (see app/trend.py); the goal date is only projected when a goal is set
+    weight_goal_kg: Optional[float] = None
+    weight_trend_window_days: int = 28
+    weight_trend_half_life_days: float = 7.0
+
+    # Compare the in-memory today state (app/today.py) against the database on every read
+    today_consistency_check: bool = False
+
+    # Rendered rows kept by the fragment cache (app/fragments.py)
+    fragment_cache_size: int = 10000
+
+    # Serve / with every panel streamed in the first response (also ?stream=1)
+    stream_dashboard: bool = False
+
+    # Google Calendar (see app/calendar_client.py); "fake" serves an in-memory calendar for tests
+    calendar_backend: str = "google"
+    google_token_path: str = "/data/google_calendar_token.json"
+    calendar_refresh_margin_s: int = 300
+    calendar_timeout_s: float = 10.0  # socket timeout of each Google connection
+    calendar_call_timeout_s: float = 5.0  # how long a request waits on calendar I/O before giving up
+    calendar_workers: int = 4  # threads (and Google connections) for calendar I/O
+    calendar_sync_interval_s: int = 60  # local mirror refresh (app/calendar_sync.py); 0 disables the loop
+
+    # Suggestion compaction (see app/suggestions.py); an interval of 0 disables the background task
+    suggestion_dismissed_ttl_days: int = 30
+    suggestion_stale_ttl_days: int = 90
+    suggestion_compact_interval_s: int = 3600
+
+    # Due-reminder notifications (see app/scheduler.py); besides GET /reminders/events, POSTed here when set
+    reminder_webhook_url: Optional[str] = None
+    reminder_webhook_timeout_s: float = 5.0
+
 settings = Settings()
@@ -0,0 +1,200 @@
+"""Subscription cost engine.
+
+The one place billing cycles are normalized. Every Subscription stores its
+monthly- and yearly-equivalent cost (`monthly_cost`, `yearly_cost`), computed
+from the effective price (`my_price` when shared, else `full_price`) by mapper
+events on insert and update, so totals are plain SUMs. A lifetime purchase is
+a one-off, not a running cost: it counts as 0 in both.
+
+`totals` answers every total and per-category breakdown from one GROUP BY
+over the active subscriptions, cached until the next subscription write.
+
+`projection` lays out every future charge over the next months. Charge dates
+come from `next_billing` by date arithmetic, one step per billing period
+(monthly charges keep their day of month, clamped to short months), and the
+result is cached per (subscription version, start day, months).
+"""
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import case, event, func
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import versions
+from app.models import BillingCycle, Subscription
+
+# cost per month / per year of one unit of price, by billing cycle
+MONTHLY = {BillingCycle.WEEKLY: 4.33, BillingCycle.MONTHLY: 1.0, BillingCycle.YEARLY: 1 / 12, BillingCycle.LIFETIME: 0.0}
+YEARLY = {BillingCycle.WEEKLY: 52.0, BillingCycle.MONTHLY: 12.0, BillingCycle.YEARLY: 1.0, BillingCycle.LIFETIME: 0.0}
+
+def effective_price(sub: Subscription) -> float:
+    return sub.my_price if sub.my_price is not None else sub.full_price
+
+def monthly_cost(sub: Subscription) -> float:
+    return effective_price(sub) * MONTHLY[BillingCycle(sub.billing_cycle)]
+
+def yearly_cost(sub: Subscription) -> float:
+    return effective_price(sub) * YEARLY[BillingCycle(sub.billing_cycle)]
+
+@event.listens_for(Subscription, "before_insert")
+@event.listens_for(Subscription, "before_update")
+def _store_costs(mapper, connection, target):
+    target.monthly_cost = monthly_cost(target)
+    target.yearly_cost = yearly_cost(target)
+
+def cost_expressions(table=Subscription.__table__):
+    """SQL for the same normalization, used by the backfill migration"""
+    price = func.coalesce(table.c.my_price, table.c.full_price)
+    def normalized(factors):
+        return price * case(*((table.c.billing_cycle == cycle, factor) for cycle, factor in factors.items()), else_=0.0)
+    return {"monthly_cost": normalized(MONTHLY), "yearly_cost": normalized(YEARLY)}
+
+# --- Totals ---
+
+_lock = threading.Lock()
+_cached = None  # (subscription version, totals)
+
+def totals_statement():
+    return (
+        select(Subscription.category, func.count(Subscription.id), func.sum(Subscription.monthly_cost), func.sum(Subscription.yearly_cost))
+        .where(Subscription.active == True)
+        .group_by(Subscription.category)
+    )
+
+def _build(rows) -> dict:
+    by_category = {}
+    for category, count, monthly, yearly in rows:
+        by_category[category.value if category else "other"] = {"count": count, "monthly": monthly or 0.0, "yearly": yearly or 0.0}
+    return {
+        "monthly": round(sum(c["monthly"] for c in by_category.values()), 2),
+        "yearly": round(sum(c["yearly"] for c in by_category.values()), 2),
+        "count": sum(c["count"] for c in by_category.values()),
+        "by_category": {
+            name: {"count": c["count"], "monthly": round(c["monthly"], 2), "yearly": round(c["yearly"], 2)}
+            for name, c in by_category.items()
+        },
+    }
+
+def _get(version):
+    with _lock:
+        return _cached[1] if _cached is not None and _cached[0] == version else None
+
+def _put(version, totals: dict) -> dict:
+    global _cached
+    with _lock:
+        _cached = (version, totals)
+    return totals
+
+def totals(session: Session) -> dict:
+    """Active subscription totals: monthly, yearly, count and by_category (values rounded to cents)"""
+    version = versions.get("subscription")
+    return _get(version) or _put(version, _build(session.exec(totals_statement()).all()))
+
+async def totals_async(session: AsyncSession) -> dict:
+    version = versions.get("subscription")
+    return _get(version) or _put(version, _build((await session.exec(totals_statement())).all()))
+
+# --- Projection ---
+
+MAX_PROJECTION_MONTHS = 24
+MAX_CACHED_PROJECTIONS = 8
+
+_projections: OrderedDict = OrderedDict()
+
+def add_months(day: date, months: int) -> date:
+    """`day` moved by whole months, clamped to the end of shorter months"""
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+def charge_dates(first: date, cycle: BillingCycle, start: date, end: date) -> list[date]:
+    """Charges of a subscription billed on `first` and every cycle after it, within [start, end]"""
+    cycle = BillingCycle(cycle)
+    if cycle == BillingCycle.LIFETIME:
+        return [first] if start <= first <= end else []
+    if cycle == BillingCycle.WEEKLY:
+        skip = max(0, -(-(start - first).days // 7))  # whole weeks until the first charge >= start
+        return [first + timedelta(weeks=k) for k in range(skip, (end - first).days // 7 + 1)]
+    step = 12 if cycle == BillingCycle.YEARLY else 1
+    k = max(0, ((start.year - first.year) * 12 + start.month - first.month) // step - 1)
+    dates = []
+    while (day := add_months(first, k * step)) <= end:
+        if day >= start:
+            dates.append(day)
+        k += 1
+    return dates
+
+def projection_statement():
+    return (
+        select(Subscription.id, Subscription.name, Subscription.next_billing, Subscription.billing_cycle,
+               Subscription.my_price, Subscription.full_price, Subscription.monthly_cost)
+        .where(Subscription.active == True)
+        .order_by(Subscription.name)
+    )
+
+def _project(rows, start: date, months: int) -> dict:
+    end = add_months(start, months) - timedelta(days=1)
+    charges, unscheduled = [], []
+    for id, name, first, cycle, my_price, full_price, monthly in rows:
+        if first is None:
+            unscheduled.append({"id": id, "name": name, "monthly_cost": round(monthly, 2)})
+            continue
+        amount = my_price if my_price is not None else full_price
+        for day in charge_dates(first, cycle, start, end):
+            charges.append({"date": day, "subscription_id": id, "name": name, "amount": amount, "full_price": full_price})
+    charges.sort(key=lambda c: c["date"])
+
+    by_month = {add_months(start, i).strftime("%Y-%m"): [0.0, 0.0, 0] for i in range(months + 1)}
+    by_day = {}
+    for charge in charges:
+        for bucket in (by_month.setdefault(charge["date"].strftime("%Y-%m"), [0.0, 0.0, 0]),
+                       by_day.setdefault(charge["date"], [0.0, 0.0, 0])):
+            bucket[0] += charge["amount"]
+            bucket[1] += charge["full_price"]
+            bucket[2] += 1
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "months": months,
+        "total": round(sum(c["amount"] for c in charges), 2),
+        "full_total": round(sum(c["full_price"] for c in charges), 2),
+        "by_month": [
+            {"month": month, "total": round(total, 2), "full_total": round(full, 2), "charges": count}
+            for month, (total, full, count) in by_month.items()
+            if month <= end.strftime("%Y-%m")
+        ],
+        "by_day": [
+            {"date": day.isoformat(), "total": round(total, 2), "full_total": round(full, 2), "charges": count}
+            for day, (total, full, count) in by_day.items()
+        ],
+        "charges": [{**c, "date": c["date"].isoformat()} for c in charges],
+        "unscheduled": unscheduled,
+    }
+
+def _projection_key(start: Optional[date], months: int):
+    return (versions.get("subscription"), start or date.today(), min(max(months, 1), MAX_PROJECTION_MONTHS))
+
+def _cached_projection(key):
+    with _lock:
+        if key in _projections:
+            _projections.move_to_end(key)
+            return _projections[key]
+    return None
+
+def _store_projection(key, result: dict) -> dict:
+    with _lock:
+        _projections[key] = result
+        while len(_projections) > MAX_CACHED_PROJECTIONS:
+            _projections.popitem(last=False)
+    return result
+
+def projection(session: Session, months: int = 12, start: Optional[date] = None) -> dict:
+    """Every charge of the active subscriptions from `start` (today) for `months` months, with per-day and per-month sums"""
+    key = _projection_key(start, months)
+    return _cached_projection(key) or _store_projection(key, _project(session.exec(projection_statement()).all(), key[1], key[2]))
+
+async def projection_async(session: AsyncSession, months: int = 12, start: Optional[date] = None) -> dict:
+    key = _projection_key(start, months)
+    return _cached_projection(key) or _store_projection(key, _project((await session.exec(projection_statement())).all(), key[1], key[2]))
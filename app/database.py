@@ -1,17 +1,112 @@
-from sqlmodel import SQLModel, create_engine, Session
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
+import app.rollup  # noqa: F401 -- registers the daily_rollup mapper events
+import app.versions  # noqa: F401 -- registers the change-counter session events
+import app.today  # noqa: F401 -- registers the today-state session events
+import app.costs  # noqa: F401 -- registers the subscription cost mapper events
+import app.suggestions  # noqa: F401 -- registers the suggestion content-hash mapper events
+import app.scheduler  # noqa: F401 -- registers the reminder scheduler session events
 
 engine = None
+read_engine = None
+async_read_engine = None
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA temp_store = {settings.sqlite_temp_store}")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    else:
+        # journal_mode is persistent in the file, so only the writer needs to set it
+        cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.close()
+
+def _make_engine(read_only: bool, pool_size: int, max_overflow: int = 0):
+    eng = create_engine(
+        f"sqlite:///{settings.database_path}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=30,
+    )
+    event.listen(eng, "connect", lambda conn, _: _apply_pragmas(conn, read_only))
+    return eng
 
 def get_engine():
+    """Writer engine: a single pooled connection, so writes are serialized in-process."""
     global engine
     if engine is None:
-        engine = create_engine(f"sqlite:///{settings.database_path}", connect_args={"check_same_thread": False})
+        engine = _make_engine(read_only=False, pool_size=1)
     return engine
 
+def get_read_engine():
+    """Reader engine: a pool of query_only connections that never block on the writer under WAL."""
+    global read_engine
+    if read_engine is None:
+        with get_engine().connect():
+            pass  # the writer creates the file and switches it to WAL first
+        read_engine = _make_engine(read_only=True, pool_size=settings.sqlite_reader_pool_size,
+                                   max_overflow=settings.sqlite_reader_max_overflow)
+    return read_engine
+
+def get_async_read_engine():
+    """Async reader engine (aiosqlite) for the `async def` routes, so queries don't run on the event loop."""
+    global async_read_engine
+    if async_read_engine is None:
+        get_read_engine()
+        async_read_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{settings.database_path}",
+            poolclass=AsyncAdaptedQueuePool,  # explicit: older aiosqlite dialects default to NullPool, which rejects pool_size
+            pool_size=settings.sqlite_reader_pool_size,
+            max_overflow=settings.sqlite_reader_max_overflow,
+        )
+        event.listen(async_read_engine.sync_engine, "connect", lambda conn, _: _apply_pragmas(conn, True))
+    return async_read_engine
+
 def init_db():
-    SQLModel.metadata.create_all(get_engine())
+    from app.migrations import ensure_schema
+    ensure_schema(get_engine())
+    get_read_engine()  # created up front: building it lazily inside a writer session would wait on the writer's only connection
 
-def get_session():
+def get_write_session():
     with Session(get_engine()) as session:
         yield session
+
+def get_read_session():
+    with Session(get_read_engine()) as session:
+        yield session
+
+def get_session(request: Request):
+    """Hand out a reader session for safe methods and the writer session for everything else."""
+    if request.method in READ_METHODS:
+        with Session(get_read_engine()) as session:
+            yield session
+    else:
+        with Session(get_engine()) as session:
+            yield session
+
+async def get_async_session():
+    """Read-only AsyncSession. Writes stay on the synchronous single-writer engine."""
+    async with AsyncSession(get_async_read_engine()) as session:
+        yield session
+
+async def run_read(fn, *args):
+    """Run fn(session, *args) against a reader session in the threadpool, for heavy queries
+    whose row processing shouldn't hold the event loop."""
+    def call():
+        with Session(get_read_engine()) as session:
+            return fn(session, *args)
+    return await run_in_threadpool(call)
@@ -0,0 +1,63 @@
+"""Precompiled Jinja macros for the HTMX fragments, with a row-level cache.
+
+The macro files under app/templates/partials/ are compiled and imported once
+(`Template.module`); after that a render is a plain function call with
+autoescaping. Row macros go through `row`, which caches the rendered markup
+keyed by (macro, row id, the values passed in), so a row whose fields haven't
+changed is never rendered twice. The values are the row's version: any edit
+changes the key, and the stale entry just ages out (least recently used first,
+so today's rows outlive one-off history renders).
+"""
+import os
+import threading
+from collections import OrderedDict
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from app import metrics
+from app.config import settings
+
+env = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
+    autoescape=select_autoescape(default=True),
+)
+
+_modules: dict = {}
+_lock = threading.Lock()
+_cache: OrderedDict = OrderedDict()
+
+def macros(name: str):
+    """The exported macros of partials/<name>.html, compiled on first use"""
+    module = _modules.get(name)
+    if module is None:
+        module = _modules[name] = env.get_template(f"partials/{name}.html").module
+    return module
+
+def rows(module: str, macro: str, items) -> Markup:
+    """Render macro(id, *values) for each (id, *values) tuple, reusing markup for rows seen before with the same values"""
+    prefix = (module, macro)
+    keys = [prefix + tuple(item) for item in items]
+    with _lock:
+        found = [_cache.get(key) for key in keys]
+        for key, markup in zip(keys, found):
+            if markup is not None:
+                _cache.move_to_end(key)
+    fresh = {}
+    if None in found:
+        render = getattr(macros(module), macro)
+        for i, key in enumerate(keys):
+            if found[i] is None:
+                found[i] = fresh[key] = render(*key[2:])
+        with _lock:
+            _cache.update(fresh)
+            while len(_cache) > settings.fragment_cache_size:
+                _cache.popitem(last=False)
+    metrics.inc("fragments.hits", len(keys) - len(fresh))
+    metrics.inc("fragments.misses", len(fresh))
+    return Markup("".join(found))  # every entry is already escaped markup
+
+def row(module: str, macro: str, id, *values) -> Markup:
+    return rows(module, macro, [(id, *values)])
+
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,225 @@
+"""Streaming bulk import of historical logs from NDJSON or CSV.
+
+Rows are validated against the table models one at a time and written with
+executemany in batches of `import_batch_rows`, one transaction per batch, so
+memory stays flat however large the input is. Weight rows keep the
+one-entry-per-day upsert semantics of POST /api/weight.
+
+    python -m app.importer food history.ndjson
+    python -m app.importer weight weights.csv --format csv
+"""
+import argparse
+import codecs
+import csv
+import json
+import logging
+import sys
+from collections import deque
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select, update
+from app import rollup, today, versions
+from app.config import settings
+from app.database import get_engine
+from app.models import FoodLog, TrainingLog, MentalLog, WeightLog
+
+logger = logging.getLogger(__name__)
+
+IMPORTABLE = {
+    "food": FoodLog,
+    "training": TrainingLog,
+    "mental": MentalLog,
+    "weight": WeightLog,
+}
+FORMATS = ("ndjson", "csv")
+MAX_REPORTED_ERRORS = 20
+
+class Importer:
+    def __init__(self, kind: str, format: str = "ndjson", batch_size: int = None, progress=None):
+        self.model = IMPORTABLE[kind]
+        self.table = self.model.__table__
+        self.format = format
+        self.batch_size = batch_size or settings.import_batch_rows
+        self.progress = progress
+        self.pending: list[dict] = []
+        self.header = None
+        self.line_no = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors: list[dict] = []
+        # CSV: one reader over the whole input. Lines are buffered until they hold a complete record
+        # (an even number of quotes -- a quoted field may span lines), so the reader never runs dry mid-record.
+        self.csv_lines: deque = deque()
+        self.csv_record: list[str] = []
+        self.csv_reader = csv.reader(self._csv_lines())
+
+    def _csv_lines(self):
+        while True:  # only advanced once a complete record is buffered
+            yield self.csv_lines.popleft()
+
+    def feed(self, line: str) -> bool:
+        """Parse and validate one input line (without its newline); returns True once a batch is ready to flush."""
+        self.line_no += 1
+        if self.format == "csv":
+            self.csv_record.append(line + "\n")
+            if sum(part.count('"') for part in self.csv_record) % 2:
+                return False  # a quoted field continues on the next line
+            record, self.csv_record = "".join(self.csv_record), []
+            if not record.strip():
+                return False
+            self.csv_lines.append(record)
+            line = record
+        else:
+            line = line.rstrip("\r")
+            if not line.strip():
+                return False
+        try:
+            raw = self._parse(line)
+        except (ValueError, csv.Error) as exc:
+            self._reject(str(exc))
+            return False
+        if raw is None:
+            return False  # CSV header
+        row = {k: v for k, v in raw.items() if k != "id" and v not in ("", None)}
+        try:
+            entry = self.model.model_validate(row)
+        except ValidationError as exc:
+            self._reject("; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()))
+            return False
+        self.pending.append(entry.model_dump(exclude={"id"}))
+        return len(self.pending) >= self.batch_size
+
+    def flush(self):
+        """Write the pending batch in its own transaction."""
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        days = [row["logged_at"] if self.model is WeightLog else row["logged_at"].date() for row in rows]
+        with get_engine().begin() as conn:
+            if self.model is WeightLog:
+                self._upsert_weights(conn, rows)
+            else:
+                conn.execute(self.table.insert(), rows)
+                self.inserted += len(rows)
+            # Core executemany bypasses the rollup mapper events
+            # (only the days this batch touched: an unsorted backfill spans all of history in every batch)
+            rollup.rebuild_days(conn, days)
+        today.invalidate()  # before the bump, so the new version never serves the old state
+        versions.bump(self.table.name)
+        self.batches += 1
+        logger.info("import %s: batch %d, %d inserted, %d updated, %d rejected",
+                    self.table.name, self.batches, self.inserted, self.updated, self.rejected)
+        if self.progress:
+            self.progress(self.summary())
+
+    def summary(self) -> dict:
+        return {
+            "table": self.table.name,
+            "lines": self.line_no,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    def finish(self):
+        """Reject a CSV record left open by an unterminated quote at the end of the input."""
+        if self.csv_record:
+            self.csv_record = []
+            self._reject("unterminated quoted field")
+
+    def _parse(self, line: str):
+        if self.format == "csv":
+            values = next(self.csv_reader)
+            if self.header is None:
+                self.header = [v.strip() for v in values]
+                return None
+            if len(values) != len(self.header):
+                raise ValueError(f"expected {len(self.header)} columns, got {len(values)}")
+            return dict(zip(self.header, values))
+        raw = json.loads(line)
+        if not isinstance(raw, dict):
+            raise ValueError("each line must be a JSON object")
+        return raw
+
+    def _reject(self, message: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": self.line_no, "error": message})
+
+    def _upsert_weights(self, conn, rows: list[dict]):
+        by_day = {row["logged_at"]: row for row in rows}  # last row for a day wins, like repeated POSTs
+        existing = dict(conn.execute(
+            select(WeightLog.logged_at, WeightLog.id).where(WeightLog.logged_at.in_(list(by_day)))
+        ).all())
+        updates = [
+            {"b_id": existing[day], "b_weight_kg": row["weight_kg"], "b_notes": row["notes"]}
+            for day, row in by_day.items() if day in existing
+        ]
+        inserts = [row for day, row in by_day.items() if day not in existing]
+        if updates:
+            conn.execute(
+                update(self.table)
+                .where(self.table.c.id == bindparam("b_id"))
+                .values(weight_kg=bindparam("b_weight_kg"), notes=bindparam("b_notes")),
+                updates,
+            )
+        if inserts:
+            conn.execute(self.table.insert(), inserts)
+        self.updated += len(updates)
+        self.inserted += len(inserts)
+
+async def import_stream(importer: Importer, chunks, run_sync):
+    """Feed an async iterator of byte chunks through the importer.
+
+    Batches are flushed through `run_sync` (e.g. run_in_threadpool) so the
+    blocking writes stay off the event loop.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            if importer.feed(line):
+                await run_sync(importer.flush)
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        importer.feed(tail)
+    importer.finish()
+    await run_sync(importer.flush)
+    return importer.summary()
+
+def import_file(importer: Importer, lines) -> dict:
+    for line in lines:
+        if importer.feed(line.rstrip("\n")):
+            importer.flush()
+    importer.finish()
+    importer.flush()
+    return importer.summary()
+
+def main(argv: list[str]) -> int:
+    from app.database import init_db
+    parser = argparse.ArgumentParser(prog="python -m app.importer")
+    parser.add_argument("kind", choices=sorted(IMPORTABLE))
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension, else ndjson")
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args(argv)
+
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    progress = lambda s: print(f"{s['lines']} lines, {s['inserted']} inserted, {s['updated']} updated, {s['rejected']} rejected", file=sys.stderr)
+    init_db()
+    importer = Importer(args.kind, format, args.batch_size, progress)
+    if args.path == "-":
+        summary = import_file(importer, sys.stdin)
+    else:
+        with open(args.path, encoding="utf-8", newline="") as f:
+            summary = import_file(importer, f)
+    print(json.dumps(summary, indent=2))
+    return 0 if not summary["rejected"] else 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
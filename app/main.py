@@ -2,12 +2,26 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from app.database import init_db
-from app.routers import reminders, food, training, mental, summary, dashboard, ui, weight, stats, calendar, subscriptions, suggestions
+from app.calendar_client import calendar_client
+from app.calendar_sync import calendar_sync
+from app.suggestions import compactor
+from app.scheduler import scheduler
+from app.writequeue import write_queue
+from app.routers import reminders, food, training, mental, summary, dashboard, ui, weight, stats, calendar, subscriptions, suggestions, metrics, imports, export
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    calendar_client.start()
+    calendar_sync.start()
+    compactor.start()
+    scheduler.start()
     yield
+    scheduler.stop()
+    compactor.stop()
+    calendar_sync.stop()
+    calendar_client.stop()
+    write_queue.stop()
 
 app = FastAPI(title="Life Dashboard", lifespan=lifespan)
 
@@ -22,6 +36,9 @@ app.include_router(dashboard.router, prefix="/api")
 app.include_router(weight.router, prefix="/api")
 app.include_router(stats.router, prefix="/api")
 app.include_router(calendar.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(imports.router, prefix="/api")
+app.include_router(export.router, prefix="/api")
 app.include_router(subscriptions.router)  # prefix already in router
 app.include_router(suggestions.router)    # prefix already in router
 app.include_router(ui.router)
@@ -0,0 +1,40 @@
+import threading
+from collections import deque
+
+# In-process counters and sample windows, read by GET /api/metrics.
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_samples: dict[str, deque] = {}
+_totals: dict[str, list] = {}  # name -> [count, sum, max]
+
+WINDOW = 1024
+
+def inc(name: str, value: float = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name: str, value: float):
+    with _lock:
+        _samples.setdefault(name, deque(maxlen=WINDOW)).append(value)
+        totals = _totals.setdefault(name, [0, 0.0, value])
+        totals[0] += 1
+        totals[1] += value
+        totals[2] = max(totals[2], value)
+
+def _quantile(values: list, q: float):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def snapshot() -> dict:
+    with _lock:
+        summaries = {}
+        for name, window in _samples.items():
+            values = sorted(window)
+            count, total, peak = _totals[name]
+            summaries[name] = {
+                "count": count,
+                "mean": round(total / count, 3),
+                "max": round(peak, 3),
+                "p50": round(_quantile(values, 0.50), 3),
+                "p99": round(_quantile(values, 0.99), 3),
+            }
+        return {"counters": dict(_counters), "summaries": summaries}
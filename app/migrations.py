@@ -0,0 +1,252 @@
+"""Versioned schema migrations and query-plan report.
+
+The schema version lives in SQLite's ``PRAGMA user_version``. Each migration
+runs in its own transaction and bumps the version, so an existing database is
+brought up to date step by step and a fresh one (already built by
+``create_all``) just fast-forwards through no-op ``IF NOT EXISTS`` steps.
+
+``ensure_schema`` is what startup calls: it compares a fingerprint of the
+declared models against the one stored in ``schema_meta`` and only falls back
+to ``create_all`` + ``migrate`` when they differ.
+
+    python -m app.migrations           # upgrade the configured database
+    python -m app.migrations plans     # EXPLAIN QUERY PLAN for every hot query
+"""
+import hashlib
+import sys
+from datetime import date, datetime
+from sqlalchemy import Connection, tuple_, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, select, func
+from app.costs import cost_expressions, projection_statement, totals_statement
+from app.rollup import rebuild as rebuild_rollup
+from app.scheduler import pending_statement as pending_reminders_statement
+from app.suggestions import content_hash
+from app.models import Reminder, ReminderStatus, FoodLog, TrainingLog, MentalLog, DailySummary, WeightLog, Subscription, Suggestion, CalendarEvent
+
+def add_column(table: str, column: str, ddl: str):
+    """A step adding a column to an existing table; a no-op when create_all already built it."""
+    def step(conn: Connection):
+        if column not in {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return step
+
+def dedupe_suggestions(conn: Connection):
+    """Hash every suggestion and fold duplicates into the newest row: highest priority, a dismissal sticks."""
+    rows = conn.exec_driver_sql("SELECT id, category, content, priority, dismissed, dismissed_at FROM suggestion ORDER BY id")
+    keep, drop = {}, []
+    for id, category, content, priority, dismissed, dismissed_at in rows:
+        key = (category, content_hash(content))
+        if key in keep:
+            older = keep[key]
+            drop.append(older["id"])
+            priority = max(priority, older["priority"])
+            if older["dismissed"] and not dismissed:
+                dismissed, dismissed_at = True, older["dismissed_at"]
+        keep[key] = {"id": id, "hash": key[1], "priority": priority, "dismissed": dismissed, "dismissed_at": dismissed_at}
+    if drop:
+        conn.exec_driver_sql("DELETE FROM suggestion WHERE id = ?", [(id,) for id in drop])
+    if keep:
+        conn.exec_driver_sql(
+            "UPDATE suggestion SET content_hash = ?, priority = ?, dismissed = ?, dismissed_at = ? WHERE id = ?",
+            [(k["hash"], k["priority"], k["dismissed"], k["dismissed_at"], k["id"]) for k in keep.values()],
+        )
+
+MIGRATIONS = [
+    (1, "indexes on hot query columns", [
+        "CREATE INDEX IF NOT EXISTS ix_foodlog_logged_at ON foodlog (logged_at)",
+        "CREATE INDEX IF NOT EXISTS ix_traininglog_logged_at ON traininglog (logged_at)",
+        "CREATE INDEX IF NOT EXISTS ix_mentallog_logged_at ON mentallog (logged_at)",
+        "CREATE INDEX IF NOT EXISTS ix_weightlog_logged_at ON weightlog (logged_at)",
+        "CREATE INDEX IF NOT EXISTS ix_reminder_status ON reminder (status)",
+        "CREATE INDEX IF NOT EXISTS ix_subscription_active_category_name ON subscription (active, category, name)",
+        "CREATE INDEX IF NOT EXISTS ix_subscription_active_name ON subscription (active, name)",
+        "CREATE INDEX IF NOT EXISTS ix_suggestion_category_dismissed_priority_created ON suggestion (category, dismissed, priority, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_suggestion_dismissed_priority_created ON suggestion (dismissed, priority, created_at)",
+        "ANALYZE",
+    ]),
+    (2, "keyset pagination indexes for reminders", [
+        "CREATE INDEX IF NOT EXISTS ix_reminder_status_created_at ON reminder (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_reminder_created_at ON reminder (created_at)",
+    ]),
+    (3, "backfill daily_rollup", [
+        lambda conn: rebuild_rollup(conn),
+    ]),
+    (4, "calendar mirror range index", [
+        "CREATE INDEX IF NOT EXISTS ix_calendarevent_calendar_start ON calendarevent (calendar_id, start_at)",
+    ]),
+    (5, "stored subscription costs", [
+        add_column("subscription", "monthly_cost", "FLOAT NOT NULL DEFAULT 0"),
+        add_column("subscription", "yearly_cost", "FLOAT NOT NULL DEFAULT 0"),
+        lambda conn: conn.execute(update(Subscription.__table__).values(**cost_expressions())),
+    ]),
+    (6, "suggestion content hashes, deduplicated", [
+        add_column("suggestion", "content_hash", "VARCHAR"),
+        dedupe_suggestions,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_suggestion_category_content_hash ON suggestion (category, content_hash)",
+    ]),
+    (7, "reminder notifications", [
+        add_column("reminder", "notified_at", "DATETIME"),
+        "CREATE INDEX IF NOT EXISTS ix_reminder_status_notified_due ON reminder (status, notified_at, due_at)",
+    ]),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+def current_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def migrate(engine) -> int:
+    """Apply every pending migration; returns the resulting schema version."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    for number, description, steps in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.exec_driver_sql(step)
+            conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+        version = number
+    return version
+
+# --- Startup fast path ---
+
+def schema_fingerprint() -> str:
+    """Hash of every declared table, column and index plus the migration head."""
+    digest = hashlib.sha256(f"head={HEAD}".encode())
+    for table in SQLModel.metadata.sorted_tables:
+        digest.update(f"|{table.name}".encode())
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}".encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(f"|{index.name}:{[c.name for c in index.columns]}:{index.unique}".encode())
+    return digest.hexdigest()
+
+def stored_fingerprint(conn: Connection):
+    try:
+        return conn.exec_driver_sql("SELECT value FROM schema_meta WHERE key = 'fingerprint'").scalar()
+    except OperationalError:
+        return None  # schema_meta doesn't exist yet
+
+def ensure_schema(engine) -> bool:
+    """Bring the database up to the declared schema; returns False when it already was."""
+    fingerprint = schema_fingerprint()
+    with engine.connect() as conn:
+        if stored_fingerprint(conn) == fingerprint and current_version(conn) == HEAD:
+            return False
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.exec_driver_sql("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+    return True
+
+# --- Query plans ---
+
+def hot_queries():
+    """The statements the routers issue on every request, keyed by where they come from."""
+    day = date.today()
+    start = datetime.combine(day, datetime.min.time())
+    queries = {}
+    for name, model in (("food", FoodLog), ("training", TrainingLog), ("mental", MentalLog)):
+        queries[f"{name}.list_by_date"] = select(model).where(model.logged_at >= start).where(model.logged_at <= start).order_by(model.logged_at.desc())
+        queries[f"{name}.today_partial"] = select(model).where(model.logged_at >= start)
+    queries["history.food"] = select(FoodLog).order_by(FoodLog.logged_at.desc()).limit(20)
+    queries["history.training"] = select(TrainingLog).order_by(TrainingLog.logged_at.desc()).limit(10)
+    queries["reminders.pending"] = select(Reminder).where(Reminder.status == ReminderStatus.PENDING)
+    queries["reminders.schedule"] = pending_reminders_statement()
+    queries["summary.by_date"] = select(DailySummary).where(DailySummary.summary_date == day)
+    queries["stats.training_count"] = select(func.count(TrainingLog.id)).where(TrainingLog.logged_at >= start)
+    queries["stats.training_window"] = select(TrainingLog).where(TrainingLog.logged_at >= start).order_by(TrainingLog.logged_at.asc())
+    queries["weight.window"] = select(WeightLog).where(WeightLog.logged_at >= day).order_by(WeightLog.logged_at.asc())
+    queries["weight.latest"] = select(WeightLog).order_by(WeightLog.logged_at.desc()).limit(1)
+    queries["weight.before"] = select(WeightLog).where(WeightLog.logged_at <= day).order_by(WeightLog.logged_at.desc()).limit(1)
+    queries["weight.trend_series"] = select(func.julianday(WeightLog.logged_at), WeightLog.weight_kg).order_by(WeightLog.logged_at.asc())
+    queries["weight.upsert_lookup"] = select(WeightLog).where(WeightLog.logged_at == day)
+    queries["subscriptions.list"] = select(Subscription).where(Subscription.active == True).order_by(Subscription.name)
+    queries["subscriptions.by_category"] = select(Subscription).where(Subscription.active == True).where(Subscription.category == "ai").order_by(Subscription.name)
+    queries["subscriptions.partial"] = select(Subscription).where(Subscription.active == True).order_by(Subscription.category, Subscription.name)
+    queries["subscriptions.totals"] = totals_statement()
+    queries["subscriptions.projection"] = projection_statement()
+    queries["calendar.range"] = (
+        select(CalendarEvent)
+        .where(CalendarEvent.calendar_id == "primary")
+        .where(CalendarEvent.start_at < start)
+        .where(CalendarEvent.end_at > start)
+        .order_by(CalendarEvent.start_at)
+    )
+    for name, model in (("food", FoodLog), ("training", TrainingLog), ("mental", MentalLog)):
+        queries[f"{name}.keyset_page"] = (
+            select(model)
+            .where(tuple_(model.logged_at, model.id) < tuple_(start, 0))
+            .order_by(model.logged_at.desc(), model.id.desc())
+            .limit(101)
+        )
+    queries["reminders.keyset_page"] = (
+        select(Reminder)
+        .where(Reminder.status == ReminderStatus.PENDING)
+        .where(tuple_(Reminder.created_at, Reminder.id) > tuple_(start, 0))
+        .order_by(Reminder.created_at, Reminder.id)
+        .limit(101)
+    )
+    queries["suggestions.keyset_page"] = (
+        select(Suggestion)
+        .where(Suggestion.dismissed == False)
+        .where(tuple_(Suggestion.priority, Suggestion.created_at, Suggestion.id) < tuple_(0, start, 0))
+        .order_by(Suggestion.priority.desc(), Suggestion.created_at.desc(), Suggestion.id.desc())
+        .limit(101)
+    )
+    queries["suggestions.list"] = select(Suggestion).where(Suggestion.dismissed == False).order_by(Suggestion.priority.desc(), Suggestion.created_at.desc())
+    queries["suggestions.box"] = (
+        select(Suggestion)
+        .where(Suggestion.category == "subscriptions")
+        .where(Suggestion.dismissed == False)
+        .order_by(Suggestion.priority.desc(), Suggestion.created_at.desc())
+        .limit(5)
+    )
+    return queries
+
+def explain(conn: Connection, statement) -> list[str]:
+    """EXPLAIN QUERY PLAN for a statement; bound values are irrelevant to the plan so NULLs are used."""
+    compiled = statement.compile(dialect=conn.dialect)
+    params = (None,) * len(compiled.positiontup or ())
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+def is_index_backed(plan: list[str]) -> bool:
+    for detail in plan:
+        if detail.startswith("SCAN") and "INDEX" not in detail:
+            return False
+        if "TEMP B-TREE" in detail:
+            return False
+    return True
+
+def report_query_plans(engine) -> dict:
+    """Return {query name: {"plan": [...], "indexed": bool}} for every hot query."""
+    report = {}
+    with engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            plan = explain(conn, statement)
+            report[name] = {"plan": plan, "indexed": is_index_backed(plan)}
+    return report
+
+def main(argv: list[str]) -> int:
+    from app.database import get_engine, init_db
+    init_db()
+    if argv[:1] == ["plans"]:
+        report = report_query_plans(get_engine())
+        for name, entry in report.items():
+            print(f"{'ok  ' if entry['indexed'] else 'SCAN'} {name}")
+            for detail in entry["plan"]:
+                print(f"       {detail}")
+        return 0 if all(e["indexed"] for e in report.values()) else 1
+    with get_engine().connect() as conn:
+        print(f"schema version {current_version(conn)} (head {HEAD})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,5 +1,6 @@
 from datetime import datetime, date
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from enum import Enum
 
@@ -25,18 +26,25 @@ class SubscriptionCategory(str, Enum):
     OTHER = "other"
 
 class Reminder(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_reminder_status_created_at", "status", "created_at"),
+        Index("ix_reminder_created_at", "created_at"),
+        Index("ix_reminder_status_notified_due", "status", "notified_at", "due_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     text: str
     due_at: Optional[datetime] = None
-    status: ReminderStatus = ReminderStatus.PENDING
+    status: ReminderStatus = Field(default=ReminderStatus.PENDING, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
+    notified_at: Optional[datetime] = None  # set when app/scheduler.py fired it; cleared when due_at moves
 
 class FoodLog(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     description: str
     meal_type: Optional[str] = None
-    logged_at: datetime = Field(default_factory=datetime.utcnow)
+    logged_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     notes: Optional[str] = None
 
 class TrainingLog(SQLModel, table=True):
@@ -44,7 +52,7 @@ class TrainingLog(SQLModel, table=True):
     activity: str
     duration_minutes: Optional[int] = None
     intensity: Optional[str] = None
-    logged_at: datetime = Field(default_factory=datetime.utcnow)
+    logged_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     notes: Optional[str] = None
 
 class MentalLog(SQLModel, table=True):
@@ -52,7 +60,7 @@ class MentalLog(SQLModel, table=True):
     content: str
     mood: Optional[str] = None
     tags: Optional[str] = None
-    logged_at: datetime = Field(default_factory=datetime.utcnow)
+    logged_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
 class DailySummary(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -68,10 +76,15 @@ class DailySummary(SQLModel, table=True):
 class WeightLog(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     weight_kg: float
-    logged_at: date = Field(default_factory=date.today)
+    logged_at: date = Field(default_factory=date.today, index=True)
     notes: Optional[str] = None
 
 class Subscription(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_subscription_active_category_name", "active", "category", "name"),
+        Index("ix_subscription_active_name", "active", "name"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     full_price: float  # Full subscription price
@@ -84,8 +97,16 @@ class Subscription(SQLModel, table=True):
     notes: Optional[str] = None
     active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    monthly_cost: float = 0.0  # monthly/yearly equivalents of the effective price, kept by app/costs.py
+    yearly_cost: float = 0.0
 
 class Suggestion(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_suggestion_category_dismissed_priority_created", "category", "dismissed", "priority", "created_at"),
+        Index("ix_suggestion_dismissed_priority_created", "dismissed", "priority", "created_at"),
+        Index("ux_suggestion_category_content_hash", "category", "content_hash", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     category: str  # "subscriptions", "training", "food", "money", "general"
     content: str
@@ -93,3 +114,41 @@ class Suggestion(SQLModel, table=True):
     dismissed: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     dismissed_at: Optional[datetime] = None
+    content_hash: Optional[str] = None  # of the normalized content, kept by app/suggestions.py
+
+class DailyRollup(SQLModel, table=True):
+    """Per-day aggregates maintained alongside the log tables (see app/rollup.py)."""
+    __tablename__ = "daily_rollup"
+    day: date = Field(primary_key=True)
+    food_count: int = 0
+    training_count: int = 0
+    training_minutes: int = 0
+    mental_count: int = 0
+    weight_kg: Optional[float] = None
+    energy_level: Optional[int] = None
+    sleep_quality: Optional[int] = None
+
+class CalendarEvent(SQLModel, table=True):
+    """Local mirror of a Google Calendar event (see app/calendar_sync.py)."""
+    __table_args__ = (
+        Index("ix_calendarevent_calendar_start", "calendar_id", "start_at"),
+    )
+
+    id: str = Field(primary_key=True)  # Google event id
+    calendar_id: str = "primary"
+    summary: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    start: str  # as Google sent it: RFC 3339 dateTime or a date for all-day events
+    end: Optional[str] = None
+    start_at: datetime  # start/end in naive UTC, for range queries
+    end_at: datetime
+    all_day: bool = False
+    html_link: Optional[str] = None
+    synced_at: datetime = Field(default_factory=datetime.utcnow)
+
+class CalendarSyncState(SQLModel, table=True):
+    calendar_id: str = Field(primary_key=True)
+    sync_token: Optional[str] = None
+    last_sync_at: Optional[datetime] = None
+    last_full_sync_at: Optional[datetime] = None
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Optional
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import tuple_
+
+MAX_LIMIT = 1000
+DEFAULT_LIMIT = 100
+
+def encode_cursor(values) -> str:
+    plain = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(plain).encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, columns) -> list:
+    """Decode a cursor back into values typed like the keyset columns."""
+    try:
+        plain = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if len(plain) != len(columns):
+            raise ValueError("wrong length")
+        values = []
+        for column, value in zip(columns, plain):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                values.append(date.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """An ISO from/to query value as a date (datetimes are cut to their day); 400 when invalid, like date_range."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from/to must be ISO dates or datetimes")
+
+def date_range(query, column, from_: Optional[str], to: Optional[str]):
+    """Inclusive from/to filter; plain dates cover the whole day on datetime columns."""
+    is_datetime = column.type.python_type is datetime
+    def bound(value: str, end: bool):
+        if not is_datetime:
+            return date.fromisoformat(value[:10])
+        if len(value) == 10:
+            return datetime.combine(date.fromisoformat(value), time.max if end else time.min)
+        return datetime.fromisoformat(value)
+    try:
+        if from_:
+            query = query.where(column >= bound(from_, end=False))
+        if to:
+            query = query.where(column <= bound(to, end=True))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from/to must be ISO dates or datetimes")
+    return query
+
+def keyset_page(session, query, columns, cursor: Optional[str], limit: int, request: Request, response: Response, descending: bool = True):
+    """Run one page of `query` ordered by `columns` (last one unique, normally the id).
+
+    The cursor encodes the last row's key, so every page is an index range seek
+    no matter how deep it is. When there is a next page its token goes out in
+    X-Next-Cursor and a Link: rel="next" header.
+    """
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(cursor, columns))
+        query = query.where(key < after if descending else key > after)
+    query = query.order_by(*(c.desc() if descending else c.asc() for c in columns)).limit(limit + 1)
+    rows = session.exec(query).all()
+    page, more = rows[:limit], len(rows) > limit
+    next_cursor = None
+    if more:
+        last = page[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return page, next_cursor
@@ -0,0 +1,137 @@
+"""Maintenance of the daily_rollup table.
+
+ORM inserts and deletes of the food, training and mental logs, and saves of
+weight and summary rows, adjust the day's rollup row from mapper events, i.e.
+on the same connection and in the same transaction as the write itself. Log
+rows are never edited in place, so there are no update handlers for them; a
+new edit path would need one (or a `rebuild`). Core bulk writes (the importer)
+call `rebuild_days` for the days they touched instead.
+
+    python -m app.rollup rebuild [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+"""
+import argparse
+import sys
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from sqlalchemy import Date, DateTime, bindparam, event, text
+from sqlalchemy.dialects.sqlite import insert
+from app.models import DailyRollup, DailySummary, FoodLog, MentalLog, TrainingLog, WeightLog
+
+rollup = DailyRollup.__table__
+
+def _add(connection, day: date, **deltas):
+    """Add deltas to the day's counters, creating the row if needed."""
+    stmt = insert(rollup).values(day=day, **{k: max(v, 0) for k, v in deltas.items()})
+    stmt = stmt.on_conflict_do_update(index_elements=["day"], set_={k: rollup.c[k] + v for k, v in deltas.items()})
+    connection.execute(stmt)
+
+def _set(connection, day: date, **values):
+    stmt = insert(rollup).values(day=day, **values)
+    stmt = stmt.on_conflict_do_update(index_elements=["day"], set_=values)
+    connection.execute(stmt)
+
+@event.listens_for(FoodLog, "after_insert")
+def _food_added(mapper, connection, target):
+    _add(connection, target.logged_at.date(), food_count=1)
+
+@event.listens_for(FoodLog, "after_delete")
+def _food_deleted(mapper, connection, target):
+    _add(connection, target.logged_at.date(), food_count=-1)
+
+@event.listens_for(TrainingLog, "after_insert")
+def _training_added(mapper, connection, target):
+    _add(connection, target.logged_at.date(), training_count=1, training_minutes=target.duration_minutes or 0)
+
+@event.listens_for(TrainingLog, "after_delete")
+def _training_deleted(mapper, connection, target):
+    _add(connection, target.logged_at.date(), training_count=-1, training_minutes=-(target.duration_minutes or 0))
+
+@event.listens_for(MentalLog, "after_insert")
+def _mental_added(mapper, connection, target):
+    _add(connection, target.logged_at.date(), mental_count=1)
+
+@event.listens_for(MentalLog, "after_delete")
+def _mental_deleted(mapper, connection, target):
+    _add(connection, target.logged_at.date(), mental_count=-1)
+
+@event.listens_for(WeightLog, "after_insert")
+@event.listens_for(WeightLog, "after_update")
+def _weight_saved(mapper, connection, target):
+    _set(connection, target.logged_at, weight_kg=target.weight_kg)
+
+@event.listens_for(WeightLog, "after_delete")
+def _weight_deleted(mapper, connection, target):
+    _set(connection, target.logged_at, weight_kg=None)
+
+@event.listens_for(DailySummary, "after_insert")
+@event.listens_for(DailySummary, "after_update")
+def _summary_saved(mapper, connection, target):
+    _set(connection, target.summary_date, energy_level=target.energy_level, sleep_quality=target.sleep_quality)
+
+_REBUILD = text("""
+    INSERT INTO daily_rollup (day, food_count, training_count, training_minutes, mental_count, weight_kg, energy_level, sleep_quality)
+    SELECT day, SUM(food), SUM(trainings), SUM(minutes), SUM(mental), MAX(weight), MAX(energy), MAX(sleep)
+    FROM (
+        SELECT date(logged_at) AS day, 1 AS food, 0 AS trainings, 0 AS minutes, 0 AS mental,
+               NULL AS weight, NULL AS energy, NULL AS sleep
+        FROM foodlog WHERE logged_at >= :start_at AND logged_at < :end_at
+        UNION ALL
+        SELECT date(logged_at), 0, 1, COALESCE(duration_minutes, 0), 0, NULL, NULL, NULL
+        FROM traininglog WHERE logged_at >= :start_at AND logged_at < :end_at
+        UNION ALL
+        SELECT date(logged_at), 0, 0, 0, 1, NULL, NULL, NULL
+        FROM mentallog WHERE logged_at >= :start_at AND logged_at < :end_at
+        UNION ALL
+        SELECT logged_at, 0, 0, 0, 0, weight_kg, NULL, NULL
+        FROM weightlog WHERE logged_at >= :start AND logged_at <= :end
+        UNION ALL
+        SELECT summary_date, 0, 0, 0, 0, NULL, energy_level, sleep_quality
+        FROM dailysummary WHERE summary_date >= :start AND summary_date <= :end
+    )
+    GROUP BY day
+""").bindparams(
+    bindparam("start_at", type_=DateTime()),
+    bindparam("end_at", type_=DateTime()),
+    bindparam("start", type_=Date()),
+    bindparam("end", type_=Date()),
+)
+
+def rebuild(connection, start: Optional[date] = None, end: Optional[date] = None):
+    """Recompute the rollup rows for days start..end (inclusive; default everything) from the raw tables."""
+    start = start or date(1, 1, 1)
+    end = end or date(9999, 12, 30)
+    connection.execute(rollup.delete().where(rollup.c.day >= start).where(rollup.c.day <= end))
+    connection.execute(_REBUILD, {
+        "start_at": datetime.combine(start, time.min),
+        "end_at": datetime.combine(end + timedelta(days=1), time.min),
+        "start": start,
+        "end": end,
+    })
+
+def rebuild_days(connection, days):
+    """`rebuild` just the given days, one pass per run of consecutive days."""
+    runs = []
+    for day in sorted(set(days)):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    for start, end in runs:
+        rebuild(connection, start, end)
+
+def main(argv: list[str]) -> int:
+    from app.database import get_engine, init_db
+    parser = argparse.ArgumentParser(prog="python -m app.rollup")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--from", dest="start", type=date.fromisoformat)
+    parser.add_argument("--to", dest="end", type=date.fromisoformat)
+    args = parser.parse_args(argv)
+    init_db()
+    with get_engine().begin() as conn:
+        rebuild(conn, args.start, args.end)
+        days = conn.execute(text("SELECT COUNT(*) FROM daily_rollup")).scalar()
+    print(f"daily_rollup rebuilt, {days} days")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
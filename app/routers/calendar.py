@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse, HTMLResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from datetime import datetime, timedelta
+import asyncio
 import os
-import json
-from pathlib import Path
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from app import calendar_sync
+from app.calendar_client import calendar_client, execute_batch, BATCH_LIMIT, SCOPES
+from app.config import settings
+from app.database import get_read_engine
+from app.versions import conditional
 
-# Google Calendar imports
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# Google client libraries are imported inside the functions that use them:
+# they take a noticeable share of cold start and most requests never touch them.
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 router = APIRouter(prefix="/calendar", tags=["calendar"])
 
@@ -20,8 +25,7 @@ GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET", "")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "https://life.immas.org/api/calendar/oauth/callback")
 
-SCOPES = ['https://www.googleapis.com/auth/calendar']
-TOKEN_PATH = Path("/data/google_calendar_token.json")
+TOKEN_PATH = calendar_client.token_path
 
 class EventCreate(BaseModel):
     summary: str
@@ -30,41 +34,31 @@ class EventCreate(BaseModel):
     end_time: Optional[datetime] = None
     all_day: bool = False
 
-def get_credentials() -> Optional[Credentials]:
-    """Load stored credentials if they exist and are valid."""
-    if not TOKEN_PATH.exists():
-        return None
-    
-    with open(TOKEN_PATH, 'r') as f:
-        token_data = json.load(f)
-    
-    creds = Credentials.from_authorized_user_info(token_data, SCOPES)
-    
-    if creds and creds.expired and creds.refresh_token:
-        from google.auth.transport.requests import Request
-        creds.refresh(Request())
-        save_credentials(creds)
-    
-    return creds if creds and creds.valid else None
+class EventBatchCreate(BaseModel):
+    events: list[EventCreate]
+
+class EventBatchDelete(BaseModel):
+    ids: list[str]
 
-def save_credentials(creds: Credentials):
+def get_credentials() -> Optional["Credentials"]:
+    """Stored credentials if they exist and are valid (cached, refreshed in the background)."""
+    return calendar_client.credentials()
+
+def save_credentials(creds: "Credentials"):
     """Save credentials to file."""
-    TOKEN_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(TOKEN_PATH, 'w') as f:
-        f.write(creds.to_json())
+    calendar_client.save(creds)
 
 def get_calendar_service():
-    """Get authenticated Google Calendar service."""
-    creds = get_credentials()
-    if not creds:
+    """Get authenticated Google Calendar service (reused per thread)."""
+    service = calendar_client.service()
+    if service is None:
         raise HTTPException(status_code=401, detail="Not authenticated with Google Calendar. Visit /api/calendar/auth to connect.")
-    return build('calendar', 'v3', credentials=creds)
+    return service
 
 @router.get("/status")
 def calendar_status():
     """Check if Google Calendar is connected."""
-    creds = get_credentials()
-    if creds and creds.valid:
+    if calendar_client.connected():
         return {"connected": True, "message": "Google Calendar is connected"}
     return {"connected": False, "message": "Google Calendar not connected. Visit /api/calendar/auth to connect."}
 
@@ -73,6 +67,7 @@ def calendar_auth():
     """Start OAuth flow to connect Google Calendar."""
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Google OAuth credentials not configured. Set GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET.")
+    from google_auth_oauthlib.flow import Flow
     
     flow = Flow.from_client_config(
         {
@@ -101,6 +96,7 @@ def calendar_oauth_callback(code: str, request: Request):
     """Handle OAuth callback from Google."""
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Google OAuth credentials not configured")
+    from google_auth_oauthlib.flow import Flow
     
     flow = Flow.from_client_config(
         {
@@ -118,84 +114,132 @@ def calendar_oauth_callback(code: str, request: Request):
     
     flow.fetch_token(code=code)
     save_credentials(flow.credentials)
+    calendar_sync.reset()  # possibly a different account: start the mirror over
     
     return RedirectResponse("/settings?calendar=connected")
 
-@router.get("/events")
-def list_events(days: int = 7):
-    """List upcoming calendar events."""
+async def _call(fn, *args, timeout: Optional[float] = None):
+    """Run blocking Google work on the calendar pool, mapping its failures to HTTP errors."""
+    from googleapiclient.errors import HttpError
     try:
-        service = get_calendar_service()
-        now = datetime.utcnow().isoformat() + 'Z'
-        end = (datetime.utcnow() + timedelta(days=days)).isoformat() + 'Z'
-        
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=now,
-            timeMax=end,
-            maxResults=50,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        return {
-            "count": len(events),
-            "events": [
-                {
-                    "id": e.get('id'),
-                    "summary": e.get('summary', '(No title)'),
-                    "start": e.get('start', {}).get('dateTime', e.get('start', {}).get('date')),
-                    "end": e.get('end', {}).get('dateTime', e.get('end', {}).get('date')),
-                    "description": e.get('description'),
-                    "location": e.get('location')
-                }
-                for e in events
-            ]
-        }
+        return await calendar_client.call(fn, *args, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Google Calendar did not answer in time")
     except HttpError as e:
         raise HTTPException(status_code=500, detail=f"Google Calendar API error: {str(e)}")
 
-@router.post("/events")
-def create_event(event: EventCreate):
-    """Create a new calendar event."""
-    try:
-        service = get_calendar_service()
-        
-        if event.all_day:
-            event_body = {
-                'summary': event.summary,
-                'description': event.description,
-                'start': {'date': event.start_time.strftime('%Y-%m-%d')},
-                'end': {'date': (event.end_time or event.start_time).strftime('%Y-%m-%d')}
-            }
-        else:
-            end_time = event.end_time or (event.start_time + timedelta(hours=1))
-            event_body = {
-                'summary': event.summary,
-                'description': event.description,
-                'start': {'dateTime': event.start_time.isoformat(), 'timeZone': 'Europe/Lisbon'},
-                'end': {'dateTime': end_time.isoformat(), 'timeZone': 'Europe/Lisbon'}
+def _upcoming(days: int):
+    if not calendar_client.connected():
+        raise HTTPException(status_code=401, detail="Not authenticated with Google Calendar. Visit /api/calendar/auth to connect.")
+    calendar_sync.ensure_synced()
+    now = datetime.utcnow()
+    with Session(get_read_engine()) as session:
+        return calendar_sync.events_between(session, now, now + timedelta(days=days), limit=50)
+
+# the window starts at now, so the tag also turns over each minute: events that ended or slid into it show up
+@router.get("/events", dependencies=[Depends(conditional("calendarevent", period_s=60))])
+async def list_events(days: int = 7):
+    """List upcoming calendar events (from the local mirror)."""
+    events = await _call(_upcoming, days)
+    return {
+        "count": len(events),
+        "events": [
+            {
+                "id": e.id,
+                "summary": e.summary or '(No title)',
+                "start": e.start,
+                "end": e.end,
+                "description": e.description,
+                "location": e.location
             }
-        
-        created = service.events().insert(calendarId='primary', body=event_body).execute()
-        
+            for e in events
+        ]
+    }
+
+def _event_body(event: EventCreate) -> dict:
+    if event.all_day:
         return {
-            "ok": True,
-            "event_id": created.get('id'),
-            "link": created.get('htmlLink'),
-            "summary": created.get('summary'),
-            "start": created.get('start')
+            'summary': event.summary,
+            'description': event.description,
+            'start': {'date': event.start_time.strftime('%Y-%m-%d')},
+            'end': {'date': (event.end_time or event.start_time).strftime('%Y-%m-%d')}
         }
-    except HttpError as e:
-        raise HTTPException(status_code=500, detail=f"Google Calendar API error: {str(e)}")
+    else:
+        end_time = event.end_time or (event.start_time + timedelta(hours=1))
+        return {
+            'summary': event.summary,
+            'description': event.description,
+            'start': {'dateTime': event.start_time.isoformat(), 'timeZone': 'Europe/Lisbon'},
+            'end': {'dateTime': end_time.isoformat(), 'timeZone': 'Europe/Lisbon'}
+        }
+
+def _created(created: dict) -> dict:
+    return {
+        "event_id": created.get('id'),
+        "link": created.get('htmlLink'),
+        "summary": created.get('summary'),
+        "start": created.get('start')
+    }
+
+@router.post("/events")
+async def create_event(event: EventCreate):
+    """Create a new calendar event."""
+    created = await _call(lambda: get_calendar_service().events().insert(calendarId='primary', body=_event_body(event)).execute())
+    await run_in_threadpool(calendar_sync.write_through, [created])
+    
+    return {"ok": True, **_created(created)}
 
 @router.delete("/events/{event_id}")
-def delete_event(event_id: str):
+async def delete_event(event_id: str):
     """Delete a calendar event."""
-    try:
+    await _call(lambda: get_calendar_service().events().delete(calendarId='primary', eventId=event_id).execute())
+    await run_in_threadpool(calendar_sync.write_through, [{"id": event_id, "status": "cancelled"}])
+    return {"ok": True, "deleted": event_id}
+
+def _item_error(index: int, exception) -> dict:
+    return {"index": index, "ok": False, "status": getattr(exception, "status_code", None), "error": str(exception)}
+
+@router.post("/events/batch")
+async def create_events(batch: EventBatchCreate):
+    """Create many events through the Google batch endpoint; results are per event, in order."""
+    def run():
         service = get_calendar_service()
-        service.events().delete(calendarId='primary', eventId=event_id).execute()
-        return {"ok": True, "deleted": event_id}
-    except HttpError as e:
-        raise HTTPException(status_code=500, detail=f"Google Calendar API error: {str(e)}")
+        return execute_batch(service, [
+            service.events().insert(calendarId='primary', body=_event_body(event)) for event in batch.events
+        ])
+    chunks = -(-len(batch.events) // BATCH_LIMIT)
+    outcomes = await _call(run, timeout=settings.calendar_call_timeout_s * max(chunks, 1))
+    created = [response for response, exception in outcomes if exception is None]
+    if created:
+        await run_in_threadpool(calendar_sync.write_through, created)
+    results = [
+        _item_error(i, exception) if exception is not None else
+        {"index": i, "ok": True, **_created(response)}
+        for i, (response, exception) in enumerate(outcomes)
+    ]
+    return {"ok": len(created) == len(results), "created": len(created), "failed": len(results) - len(created), "results": results}
+
+@router.post("/events/batch-delete")
+async def delete_events(batch: EventBatchDelete):
+    """Delete many events through the Google batch endpoint; results are per id, in order."""
+    def run():
+        service = get_calendar_service()
+        return execute_batch(service, [
+            service.events().delete(calendarId='primary', eventId=event_id) for event_id in batch.ids
+        ])
+    chunks = -(-len(batch.ids) // BATCH_LIMIT)
+    outcomes = await _call(run, timeout=settings.calendar_call_timeout_s * max(chunks, 1))
+    # already gone at Google (404/410) is gone from the mirror too
+    gone = [
+        {"id": event_id, "status": "cancelled"}
+        for event_id, (_, exception) in zip(batch.ids, outcomes)
+        if exception is None or getattr(exception, "status_code", None) in (404, 410)
+    ]
+    if gone:
+        await run_in_threadpool(calendar_sync.write_through, gone)
+    results = [
+        _item_error(i, exception) | {"id": event_id} if exception is not None else {"index": i, "ok": True, "id": event_id}
+        for i, (event_id, (_, exception)) in enumerate(zip(batch.ids, outcomes))
+    ]
+    deleted = sum(r["ok"] for r in results)
+    return {"ok": deleted == len(results), "deleted": deleted, "failed": len(results) - deleted, "results": results}
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from typing import Optional
+from datetime import date as date_type, datetime, time
+from enum import Enum
+import csv
+import io
+import json
+import zlib
+from app.auth import require_api_key
+from app.database import get_read_engine
+from app.models import FoodLog, TrainingLog, MentalLog, WeightLog, Reminder, DailySummary, Subscription, Suggestion
+from app.pagination import parse_date
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# name -> (model, column the from/to range applies to)
+EXPORTABLE = {
+    "food": (FoodLog, FoodLog.logged_at),
+    "training": (TrainingLog, TrainingLog.logged_at),
+    "mental": (MentalLog, MentalLog.logged_at),
+    "weight": (WeightLog, WeightLog.logged_at),
+    "reminders": (Reminder, Reminder.created_at),
+    "summaries": (DailySummary, DailySummary.summary_date),
+    "subscriptions": (Subscription, Subscription.created_at),
+    "suggestions": (Suggestion, Suggestion.created_at),
+}
+ROWS_PER_FETCH = 1000
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date_type)):
+        return value.isoformat()
+    return value
+
+def _statement(name: str, start: Optional[date_type], end: Optional[date_type]):
+    model, column = EXPORTABLE[name]
+    query = select(model.__table__)
+    is_datetime = column.type.python_type is datetime
+    if start:
+        query = query.where(column >= (datetime.combine(start, time.min) if is_datetime else start))
+    if end:
+        query = query.where(column <= (datetime.combine(end, time.max) if is_datetime else end))
+    return query.order_by(column, model.id)
+
+def _ndjson_chunks(names, start, end):
+    with get_read_engine().connect() as conn:
+        for name in names:
+            result = conn.execution_options(yield_per=ROWS_PER_FETCH).execute(_statement(name, start, end))
+            for rows in result.mappings().partitions():
+                yield "".join(
+                    json.dumps({"table": name, **{k: _plain(v) for k, v in row.items()}}) + "\n" for row in rows
+                ).encode()
+
+def _csv_chunks(name, start, end):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    with get_read_engine().connect() as conn:
+        result = conn.execution_options(yield_per=ROWS_PER_FETCH).execute(_statement(name, start, end))
+        writer.writerow(result.keys())
+        for rows in result.partitions():
+            writer.writerows([_plain(v) for v in row] for row in rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@router.get("", dependencies=[Depends(require_api_key)])
+def export_tables(
+    tables: Optional[str] = None,
+    from_date: Optional[str] = Query(default=None, alias="from"),
+    to_date: Optional[str] = Query(default=None, alias="to"),
+    format: str = "ndjson",
+    gzip: bool = False,
+):
+    """Stream tables (comma-separated, default all) as NDJSON or CSV, optionally gzipped"""
+    names = tables.split(",") if tables else list(EXPORTABLE)
+    unknown = [n for n in names if n not in EXPORTABLE]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(unknown)}")
+    start = parse_date(from_date)
+    end = parse_date(to_date)
+
+    if format == "ndjson":
+        chunks, media_type, extension = _ndjson_chunks(names, start, end), "application/x-ndjson", "ndjson"
+    elif format == "csv":
+        if len(names) != 1:
+            raise HTTPException(status_code=400, detail="CSV export takes exactly one table")
+        chunks, media_type, extension = _csv_chunks(names[0], start, end), "text/csv", "csv"
+    else:
+        raise HTTPException(status_code=400, detail="Unknown format. Use ndjson or csv.")
+
+    filename = f"life-export-{'-'.join(names) if tables else 'all'}.{extension}"
+    if gzip:
+        chunks, media_type, filename = _gzipped(chunks), "application/gzip", filename + ".gz"
+    return StreamingResponse(chunks, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app.auth import require_api_key
+from app.importer import Importer, IMPORTABLE, FORMATS, import_stream
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+@router.post("/{kind}", dependencies=[Depends(require_api_key)])
+async def import_logs(kind: str, request: Request, format: str = "ndjson"):
+    """Stream an NDJSON or CSV body into food/training/mental/weight logs"""
+    if kind not in IMPORTABLE:
+        raise HTTPException(status_code=404, detail=f"Unknown log type. Use one of: {', '.join(sorted(IMPORTABLE))}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format. Use one of: {', '.join(FORMATS)}")
+    importer = Importer(kind, format)
+    return await import_stream(importer, request.stream(), run_in_threadpool)
@@ -1,29 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlmodel import Session, select
 from typing import Optional
 from datetime import date as date_type, datetime, time
 from app.database import get_session
 from app.models import MentalLog
 from app.auth import require_api_key
+from app.writequeue import save
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, date_range, keyset_page
+from app.versions import conditional
 
 router = APIRouter(prefix="/mental", tags=["mental"])
 
 @router.post("", dependencies=[Depends(require_api_key)])
 def create_mental(entry: MentalLog, session: Session = Depends(get_session)):
-    session.add(entry)
-    session.commit()
-    session.refresh(entry)
-    return entry
+    return save(session, entry)
 
-@router.get("")
-def list_mental(date: Optional[str] = None, session: Session = Depends(get_session)):
+@router.get("", dependencies=[Depends(conditional("mentallog"))])
+def list_mental(
+    request: Request,
+    response: Response,
+    date: Optional[str] = None,
+    from_: Optional[str] = Query(default=None, alias="from"),
+    to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: Session = Depends(get_session),
+):
+    """Newest first, paged by (logged_at, id); the next page's cursor is in X-Next-Cursor"""
     query = select(MentalLog)
     if date:
         d = date_type.fromisoformat(date)
         start = datetime.combine(d, time.min)
         end = datetime.combine(d, time.max)
         query = query.where(MentalLog.logged_at >= start).where(MentalLog.logged_at <= end)
-    return session.exec(query.order_by(MentalLog.logged_at.desc())).all()
+    query = date_range(query, MentalLog.logged_at, from_, to)
+    page, _ = keyset_page(session, query, [MentalLog.logged_at, MentalLog.id], cursor, limit, request, response)
+    return page
 
 @router.delete("/{id}", dependencies=[Depends(require_api_key)])
 def delete_mental(id: int, session: Session = Depends(get_session)):
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from app import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("")
+def get_metrics():
+    """Counters and recent-sample summaries collected in this process"""
+    return metrics.snapshot()
@@ -1,34 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 from sqlmodel import Session, select
 from typing import Optional
 from datetime import datetime
 from app.database import get_session
 from app.models import Reminder, ReminderStatus
 from app.auth import require_api_key
+from app.writequeue import save
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, date_range, keyset_page
+from app.versions import conditional
+from app.scheduler import scheduler
+
+KEEPALIVE_S = 15
 
 router = APIRouter(prefix="/reminders", tags=["reminders"])
 
+class ReminderCreate(BaseModel):
+    text: str
+    due_at: Optional[datetime] = None
+    status: ReminderStatus = ReminderStatus.PENDING
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+def _validated(values: dict) -> Reminder:
+    # table models skip validation on construction; this parses due_at and friends from JSON strings
+    try:
+        return Reminder.model_validate(values)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
 @router.post("", dependencies=[Depends(require_api_key)])
-def create_reminder(reminder: Reminder, session: Session = Depends(get_session)):
-    session.add(reminder)
-    session.commit()
-    session.refresh(reminder)
-    return reminder
+def create_reminder(data: ReminderCreate, session: Session = Depends(get_session)):
+    return save(session, Reminder.model_validate(data.model_dump(exclude_none=True)))
 
-@router.get("")
-def list_reminders(status: Optional[str] = None, session: Session = Depends(get_session)):
+@router.get("", dependencies=[Depends(conditional("reminder"))])
+def list_reminders(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    from_: Optional[str] = Query(default=None, alias="from"),
+    to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: Session = Depends(get_session),
+):
+    """Oldest first, paged by (created_at, id); the next page's cursor is in X-Next-Cursor"""
     query = select(Reminder)
     if status:
         query = query.where(Reminder.status == status)
-    return session.exec(query).all()
+    query = date_range(query, Reminder.created_at, from_, to)
+    page, _ = keyset_page(session, query, [Reminder.created_at, Reminder.id], cursor, limit, request, response, descending=False)
+    return page
+
+@router.get("/events")
+async def reminder_events():
+    """Server-sent events: one `reminder` event per reminder as it comes due"""
+    async def stream():
+        subscription = scheduler.subscribers.subscribe()
+        _, queue = subscription
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: reminder\nid: {payload['id']}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            scheduler.subscribers.unsubscribe(subscription)
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @router.patch("/{id}", dependencies=[Depends(require_api_key)])
 def update_reminder(id: int, data: dict, session: Session = Depends(get_session)):
     reminder = session.get(Reminder, id)
     if not reminder:
         raise HTTPException(status_code=404, detail="Not found")
-    for k, v in data.items():
-        setattr(reminder, k, v)
+    validated = _validated({**reminder.model_dump(), **data})
+    for k in data.keys() & Reminder.model_fields.keys():
+        setattr(reminder, k, getattr(validated, k))
     if data.get("status") == "done" and not reminder.completed_at:
         reminder.completed_at = datetime.utcnow()
     session.commit()
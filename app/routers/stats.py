@@ -1,62 +1,118 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case
 from sqlmodel import Session, select, func
-from datetime import date, datetime, timedelta
-from app.database import get_session
-from app.models import TrainingLog, WeightLog, FoodLog, MentalLog
+from typing import Optional
+from datetime import date, timedelta
+from app import trend
+from app.config import settings
+from app.database import run_read
+from app.models import DailyRollup
+from app.pagination import parse_date
+from app.versions import conditional
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
-@router.get("")
-def get_stats(session: Session = Depends(get_session)):
+@router.get("", dependencies=[Depends(conditional("daily_rollup", "weightlog", daily=True))])
+async def get_stats():
     """Get aggregated statistics for dashboard"""
-    today = date.today()
+    return await run_read(_compute_stats)
+
+# metric -> aggregate over the daily rollup
+METRICS = {
+    "training_count": func.sum(DailyRollup.training_count),
+    "training_minutes": func.sum(DailyRollup.training_minutes),
+    "food_entries": func.sum(DailyRollup.food_count),
+    "mental_entries": func.sum(DailyRollup.mental_count),
+    "weight": func.round(func.avg(DailyRollup.weight_kg), 2),
+}
+
+# bucket -> SQLite expression giving the ISO date the bucket starts on
+BUCKETS = {
+    "day": DailyRollup.day,
+    "week": func.date(DailyRollup.day, "weekday 0", "-6 days"),  # Monday of the ISO week
+    "month": func.strftime("%Y-%m-01", DailyRollup.day),
+}
+
+def series(session: Session, metrics: list[str], start: date, end: date, bucket: str):
+    """[(bucket start, {metric: value})] for start..end, grouped in SQL"""
+    key = BUCKETS[bucket].label("bucket")
+    rows = session.exec(
+        select(key, *(METRICS[m].label(m) for m in metrics))
+        .where(DailyRollup.day >= start)
+        .where(DailyRollup.day <= end)
+        .group_by(key)
+        .order_by(key)
+    ).all()
+    return [(str(row[0]), dict(zip(metrics, row[1:]))) for row in rows]
+
+@router.get("/series", dependencies=[Depends(conditional("daily_rollup", daily=True))])
+async def get_series(
+    metric: str = "training_count",
+    from_date: Optional[str] = Query(default=None, alias="from"),
+    to_date: Optional[str] = Query(default=None, alias="to"),
+    bucket: str = "week",
+):
+    """Time series of one or more comma-separated metrics, bucketed by day, week or month"""
+    metrics = metric.split(",")
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metric {', '.join(unknown)}. Use one of: {', '.join(METRICS)}")
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Unknown bucket. Use one of: {', '.join(BUCKETS)}")
+    end = parse_date(to_date) or date.today()
+    start = parse_date(from_date) or end - timedelta(days=90)
+    points = await run_read(series, metrics, start, end, bucket)
+    return {
+        "from": str(start),
+        "to": str(end),
+        "bucket": bucket,
+        "series": {m: [{"bucket": b, "value": values[m]} for b, values in points] for m in metrics},
+    }
+
+@router.get("/trend", dependencies=[Depends(conditional("weightlog", daily=True))])
+async def get_weight_trend(
+    from_date: Optional[str] = Query(default=None, alias="from"),
+    window: Optional[float] = Query(default=None, gt=0, description="regression window in days"),
+    half_life: Optional[float] = Query(default=None, gt=0, description="EMA half-life in days"),
+    goal: Optional[float] = Query(default=None, gt=0, description="goal weight in kg, defaults to the configured one"),
+):
+    """Smoothed weight, rolling slope (kg/week) and projected goal date"""
+    since = parse_date(from_date) or date.today() - timedelta(days=90)
+    def compute(session: Session):
+        weight_trend = trend.get_trend(session, window, half_life)
+        return {
+            **weight_trend.summary(goal),
+            "window_days": window or settings.weight_trend_window_days,
+            "half_life_days": half_life or settings.weight_trend_half_life_days,
+            "points": weight_trend.points(since),
+        }
+    return await run_read(compute)
+
+def training_counts(session: Session, today: date):
+    """(this week, this month) training counts from the daily rollup"""
     week_start = today - timedelta(days=today.weekday())  # Monday
     month_start = today.replace(day=1)
-    
-    # Training counts
-    week_start_dt = datetime.combine(week_start, datetime.min.time())
-    month_start_dt = datetime.combine(month_start, datetime.min.time())
-    
-    trainings_this_week = session.exec(
-        select(func.count(TrainingLog.id))
-        .where(TrainingLog.logged_at >= week_start_dt)
-    ).one()
-    
-    trainings_this_month = session.exec(
-        select(func.count(TrainingLog.id))
-        .where(TrainingLog.logged_at >= month_start_dt)
+    this_week, this_month = session.exec(
+        select(
+            func.coalesce(func.sum(case((DailyRollup.day >= week_start, DailyRollup.training_count))), 0),
+            func.coalesce(func.sum(case((DailyRollup.day >= month_start, DailyRollup.training_count))), 0),
+        ).where(DailyRollup.day >= min(week_start, month_start))
     ).one()
+    return this_week, this_month
+
+def _compute_stats(session: Session):
+    today = date.today()
+    trainings_this_week, trainings_this_month = training_counts(session, today)
     
-    # Weight trend (last 30 days)
-    weight_cutoff = today - timedelta(days=30)
-    weight_entries = session.exec(
-        select(WeightLog)
-        .where(WeightLog.logged_at >= weight_cutoff)
-        .order_by(WeightLog.logged_at.asc())
-    ).all()
-    
-    weight_data = [{"date": str(w.logged_at), "weight": w.weight_kg} for w in weight_entries]
-    
-    # Calculate weight change
-    weight_change = None
-    if len(weight_entries) >= 2:
-        weight_change = round(weight_entries[-1].weight_kg - weight_entries[0].weight_kg, 1)
-    
-    # Training history for chart (last 4 weeks, grouped by week)
-    four_weeks_ago = today - timedelta(days=28)
-    four_weeks_dt = datetime.combine(four_weeks_ago, datetime.min.time())
-    
-    trainings = session.exec(
-        select(TrainingLog)
-        .where(TrainingLog.logged_at >= four_weeks_dt)
-        .order_by(TrainingLog.logged_at.asc())
-    ).all()
+    # Weight trend (last 30 days); change_30d is measured on the smoothed series
+    weight_trend = trend.get_trend(session)
     
-    # Group by week
-    weekly_training = {}
-    for t in trainings:
-        week_num = t.logged_at.isocalendar()[1]
-        weekly_training[week_num] = weekly_training.get(week_num, 0) + 1
+    # Training history for chart (last 4 weeks, keyed by the week's Monday)
+    weekly_training = {
+        bucket: values["training_count"]
+        for bucket, values in series(session, ["training_count"], today - timedelta(days=28), today, "week")
+        if values["training_count"]
+    }
     
     return {
         "training": {
@@ -65,8 +121,7 @@ def get_stats(session: Session = Depends(get_session)):
             "weekly_breakdown": weekly_training
         },
         "weight": {
-            "entries": weight_data,
-            "change_30d": weight_change,
-            "latest": weight_entries[-1].weight_kg if weight_entries else None
+            "entries": weight_trend.points(today - timedelta(days=30)),
+            **weight_trend.summary(),
         }
     }
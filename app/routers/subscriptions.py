@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, select
 from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
 
+from app import costs
 from app.database import get_session
 from app.models import Subscription, BillingCycle, SubscriptionCategory
+from app.versions import conditional
 
 router = APIRouter(prefix="/api/subscriptions", tags=["subscriptions"])
 
@@ -33,7 +35,7 @@ class SubscriptionUpdate(BaseModel):
     notes: Optional[str] = None
     active: Optional[bool] = None
 
-@router.get("")
+@router.get("", dependencies=[Depends(conditional("subscription"))])
 def list_subscriptions(
     active_only: bool = True,
     category: Optional[str] = None,
@@ -51,23 +53,8 @@ def list_subscriptions(
     query = query.order_by(Subscription.name)
     subs = session.exec(query).all()
     
-    # Calculate totals
-    monthly_total = 0.0
-    yearly_total = 0.0
-    
-    for sub in subs:
-        if not sub.active:
-            continue
-        price = sub.my_price if sub.my_price is not None else sub.full_price
-        if sub.billing_cycle == BillingCycle.MONTHLY:
-            monthly_total += price
-            yearly_total += price * 12
-        elif sub.billing_cycle == BillingCycle.YEARLY:
-            monthly_total += price / 12
-            yearly_total += price
-        elif sub.billing_cycle == BillingCycle.WEEKLY:
-            monthly_total += price * 4.33
-            yearly_total += price * 52
+    summary = costs.totals(session)
+    totals = summary["by_category"].get(category, {"count": 0, "monthly": 0.0, "yearly": 0.0}) if category else summary
     
     return {
         "subscriptions": [
@@ -76,7 +63,9 @@ def list_subscriptions(
                 "name": s.name,
                 "full_price": s.full_price,
                 "my_price": s.my_price,
-                "effective_price": s.my_price if s.my_price is not None else s.full_price,
+                "effective_price": costs.effective_price(s),
+                "monthly_cost": round(s.monthly_cost, 2),
+                "yearly_cost": round(s.yearly_cost, 2),
                 "billing_cycle": s.billing_cycle,
                 "category": s.category,
                 "is_shared": s.is_shared,
@@ -88,12 +77,20 @@ def list_subscriptions(
             for s in subs
         ],
         "totals": {
-            "monthly": round(monthly_total, 2),
-            "yearly": round(yearly_total, 2),
-            "count": len([s for s in subs if s.active]),
+            "monthly": totals["monthly"],
+            "yearly": totals["yearly"],
+            "count": totals["count"],
         }
     }
 
+@router.get("/projection", dependencies=[Depends(conditional("subscription", daily=True))])
+def subscription_projection(
+    months: int = Query(12, ge=1, le=costs.MAX_PROJECTION_MONTHS),
+    session: Session = Depends(get_session)
+):
+    """Projected charges of the active subscriptions from today: each charge date, plus per-day and per-month sums"""
+    return costs.projection(session, months)
+
 @router.post("")
 def create_subscription(data: SubscriptionCreate, session: Session = Depends(get_session)):
     """Create a new subscription"""
@@ -118,7 +115,7 @@ def create_subscription(data: SubscriptionCreate, session: Session = Depends(get
     
     return {"ok": True, "id": sub.id, "name": sub.name}
 
-@router.get("/{sub_id}")
+@router.get("/{sub_id}", dependencies=[Depends(conditional("subscription"))])
 def get_subscription(sub_id: int, session: Session = Depends(get_session)):
     """Get a single subscription"""
     sub = session.get(Subscription, sub_id)
@@ -130,7 +127,9 @@ def get_subscription(sub_id: int, session: Session = Depends(get_session)):
         "name": sub.name,
         "full_price": sub.full_price,
         "my_price": sub.my_price,
-        "effective_price": sub.my_price if sub.my_price is not None else sub.full_price,
+        "effective_price": costs.effective_price(sub),
+        "monthly_cost": round(sub.monthly_cost, 2),
+        "yearly_cost": round(sub.yearly_cost, 2),
         "billing_cycle": sub.billing_cycle,
         "category": sub.category,
         "is_shared": sub.is_shared,
@@ -190,34 +189,11 @@ def delete_subscription(sub_id: int, session: Session = Depends(get_session)):
     
     return {"ok": True, "id": sub_id}
 
-@router.get("/stats/summary")
+@router.get("/stats/summary", dependencies=[Depends(conditional("subscription"))])
 def subscription_stats(session: Session = Depends(get_session)):
     """Get subscription statistics by category"""
-    subs = session.exec(
-        select(Subscription).where(Subscription.active == True)
-    ).all()
-    
-    by_category = {}
-    for sub in subs:
-        cat = sub.category.value if sub.category else "other"
-        if cat not in by_category:
-            by_category[cat] = {"count": 0, "monthly": 0.0}
-        
-        price = sub.my_price if sub.my_price is not None else sub.full_price
-        monthly = price
-        if sub.billing_cycle == BillingCycle.YEARLY:
-            monthly = price / 12
-        elif sub.billing_cycle == BillingCycle.WEEKLY:
-            monthly = price * 4.33
-        
-        by_category[cat]["count"] += 1
-        by_category[cat]["monthly"] += monthly
-    
-    # Round values
-    for cat in by_category:
-        by_category[cat]["monthly"] = round(by_category[cat]["monthly"], 2)
-    
+    summary = costs.totals(session)
     return {
-        "by_category": by_category,
-        "total_subscriptions": len(subs),
+        "by_category": summary["by_category"],
+        "total_subscriptions": summary["count"],
     }
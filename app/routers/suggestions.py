@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
 
+from app import suggestions as suggestion_store
 from app.database import get_session
 from app.models import Suggestion
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, date_range, keyset_page
+from app.versions import conditional
 
 router = APIRouter(prefix="/api/suggestions", tags=["suggestions"])
 
@@ -14,18 +19,28 @@ class SuggestionCreate(BaseModel):
     content: str
     priority: int = 0
 
+class SuggestionItem(BaseModel):
+    content: str
+    priority: int = 0
+
 class SuggestionUpdate(BaseModel):
     content: Optional[str] = None
     priority: Optional[int] = None
     dismissed: Optional[bool] = None
 
-@router.get("")
+@router.get("", dependencies=[Depends(conditional("suggestion"))])
 def list_suggestions(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     include_dismissed: bool = False,
+    from_: Optional[str] = Query(default=None, alias="from"),
+    to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
     session: Session = Depends(get_session)
 ):
-    """List suggestions with optional filters"""
+    """List suggestions with optional filters, highest priority first, paged by cursor"""
     query = select(Suggestion)
     
     if not include_dismissed:
@@ -34,8 +49,10 @@ def list_suggestions(
     if category:
         query = query.where(Suggestion.category == category)
     
-    query = query.order_by(Suggestion.priority.desc(), Suggestion.created_at.desc())
-    suggestions = session.exec(query).all()
+    query = date_range(query, Suggestion.created_at, from_, to)
+    suggestions, next_cursor = keyset_page(
+        session, query, [Suggestion.priority, Suggestion.created_at, Suggestion.id], cursor, limit, request, response
+    )
     
     return {
         "suggestions": [
@@ -50,39 +67,46 @@ def list_suggestions(
             for s in suggestions
         ],
         "count": len(suggestions),
+        "next_cursor": next_cursor,
     }
 
 @router.post("")
 def create_suggestion(data: SuggestionCreate, session: Session = Depends(get_session)):
-    """Create a new suggestion (typically called by Smith)"""
-    suggestion = Suggestion(
-        category=data.category,
-        content=data.content,
-        priority=data.priority,
-    )
-    
-    session.add(suggestion)
+    """Create a new suggestion (typically called by Smith); re-posting one merges into the existing row"""
+    [id] = suggestion_store.upsert(session, [data.model_dump()])
     session.commit()
-    session.refresh(suggestion)
     
-    return {"ok": True, "id": suggestion.id}
+    return {"ok": True, "id": id}
+
+def insert_suggestions(session: Session, rows: list[dict]) -> list[int]:
+    """Upsert rows by content hash; ids come back in input order (duplicates share one). The caller commits."""
+    return suggestion_store.upsert(session, rows)
+
+def clear_category(session: Session, category: str) -> int:
+    """One DELETE for the whole category; returns the rows removed. The caller commits."""
+    return session.execute(delete(Suggestion).where(Suggestion.category == category)).rowcount
 
 @router.post("/bulk")
 def create_suggestions_bulk(suggestions: list[SuggestionCreate], session: Session = Depends(get_session)):
     """Create multiple suggestions at once"""
-    created = []
-    for data in suggestions:
-        suggestion = Suggestion(
-            category=data.category,
-            content=data.content,
-            priority=data.priority,
-        )
-        session.add(suggestion)
-        created.append(suggestion)
+    ids = insert_suggestions(session, [data.model_dump() for data in suggestions])
+    session.commit()
     
+    return {"ok": True, "count": len(ids), "ids": ids}
+
+@router.put("/category/{category}")
+def replace_suggestions(category: str, suggestions: list[SuggestionItem], session: Session = Depends(get_session)):
+    """Replace every suggestion in a category in one transaction, so readers never see it empty"""
+    cleared = clear_category(session, category)
+    ids = insert_suggestions(session, [{**data.model_dump(), "category": category} for data in suggestions])
     session.commit()
     
-    return {"ok": True, "count": len(created)}
+    return {"ok": True, "category": category, "cleared": cleared, "count": len(ids), "ids": ids}
+
+@router.post("/compact")
+def compact_suggestions():
+    """Delete expired dismissed and stale suggestions now instead of waiting for the background task"""
+    return {"ok": True, **suggestion_store.compact()}
 
 @router.put("/{suggestion_id}")
 def update_suggestion(suggestion_id: int, data: SuggestionUpdate, session: Session = Depends(get_session)):
@@ -101,7 +125,11 @@ def update_suggestion(suggestion_id: int, data: SuggestionUpdate, session: Sessi
             suggestion.dismissed_at = datetime.utcnow()
     
     session.add(suggestion)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="A suggestion with this content already exists in the category")
     
     return {"ok": True, "id": suggestion_id}
 
@@ -134,13 +162,7 @@ def delete_suggestion(suggestion_id: int, session: Session = Depends(get_session
 @router.delete("/clear/{category}")
 def clear_suggestions(category: str, session: Session = Depends(get_session)):
     """Clear all suggestions in a category (for refresh)"""
-    suggestions = session.exec(
-        select(Suggestion).where(Suggestion.category == category)
-    ).all()
-    
-    for s in suggestions:
-        session.delete(s)
-    
+    cleared = clear_category(session, category)
     session.commit()
     
-    return {"ok": True, "cleared": len(suggestions)}
+    return {"ok": True, "cleared": cleared}
@@ -4,6 +4,7 @@ from typing import Optional
 from app.database import get_session
 from app.models import DailySummary
 from app.auth import require_api_key
+from app.versions import conditional
 from datetime import date as date_type
 
 router = APIRouter(prefix="/summary", tags=["summary"])
@@ -29,7 +30,7 @@ def upsert_summary(entry: DailySummary, session: Session = Depends(get_session))
     session.refresh(entry)
     return entry
 
-@router.get("/{date}")
+@router.get("/{date}", dependencies=[Depends(conditional("dailysummary"))])
 def get_summary(date: str, session: Session = Depends(get_session)):
     from datetime import date as date_type
     d = date_type.fromisoformat(date)
@@ -38,6 +39,6 @@ def get_summary(date: str, session: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Not found")
     return entry
 
-@router.get("")
+@router.get("", dependencies=[Depends(conditional("dailysummary"))])
 def list_summaries(session: Session = Depends(get_session)):
     return session.exec(select(DailySummary).order_by(DailySummary.date.desc())).all()
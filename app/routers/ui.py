@@ -1,11 +1,20 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+from markupsafe import escape
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional
-from datetime import datetime, date, time
-from app.database import get_session
-from app.models import FoodLog, TrainingLog, MentalLog, Reminder, ReminderStatus, WeightLog, Subscription, BillingCycle, Suggestion
+import asyncio
+from datetime import datetime, date, time, timedelta
+from app import calendar_sync, costs, fragments, metrics, today as today_state, trend, versions
+from app.calendar_client import calendar_client
+from app.config import settings
+from app.database import get_session, get_async_session, get_read_engine, run_read
+from app.versions import conditional
+from app.writequeue import save
+from app.models import FoodLog, TrainingLog, MentalLog, Reminder, ReminderStatus, WeightLog, Subscription, Suggestion
+from app.routers.stats import training_counts
 
 router = APIRouter(tags=["ui"])
 templates = Jinja2Templates(directory="app/templates")
@@ -13,9 +22,50 @@ templates = Jinja2Templates(directory="app/templates")
 # --- Page routes ---
 
 @router.get("/")
-async def dashboard(request: Request):
+async def dashboard(request: Request, stream: Optional[bool] = None):
+    """The Today page. Streamed mode (?stream=1, or stream_dashboard in settings) renders every
+    panel server-side in the same response instead of leaving them to hx-get on load."""
+    if settings.stream_dashboard if stream is None else stream:
+        return StreamingResponse(_stream_dashboard(request), media_type="text/html")
     return templates.TemplateResponse("index.html", {"request": request})
 
+STREAM_MARKER = "<!-- stream:panels -->"
+
+def _dashboard_panels():
+    """panel element id -> coroutine rendering its contents"""
+    return {
+        "calendar-list": partial_calendar_day(0),
+        "food-list": partial_food(),
+        "training-list": partial_training(),
+        "mental-list": partial_mental(),
+        "reminder-list": partial_reminders(),
+    }
+
+async def _stream_dashboard(request: Request):
+    """Send the page shell at once, then each panel as soon as it's ready, in completion order.
+
+    Panels go out as <template> + <script>streamPanel(id)</script> chunks, so the slowest one
+    (usually the Google calendar call) never holds back the others.
+    """
+    async def run(id, panel):
+        try:
+            return id, await panel
+        except Exception as ex:
+            return id, f'<p class="text-red-400 text-sm">Error loading panel: {escape(str(ex)[:100])}</p>'
+
+    tasks = [asyncio.ensure_future(run(id, panel)) for id, panel in _dashboard_panels().items()]
+    try:
+        shell = templates.get_template("index.html").render({"request": request, "streamed": True})
+        head, tail = shell.split(STREAM_MARKER)
+        yield head
+        for next_panel in asyncio.as_completed(tasks):
+            id, html = await next_panel
+            yield f'<template id="stream-{id}">{html}</template><script>streamPanel("{id}")</script>\n'
+        yield tail
+    finally:
+        for task in tasks:
+            task.cancel()
+
 @router.get("/history")
 async def history(request: Request):
     return templates.TemplateResponse("history.html", {"request": request})
@@ -25,7 +75,7 @@ async def reminders_page(request: Request):
     return templates.TemplateResponse("reminders.html", {"request": request})
 
 @router.get("/settings")
-async def settings(request: Request):
+async def settings_page(request: Request):
     return templates.TemplateResponse("settings.html", {"request": request})
 
 @router.get("/analytics")
@@ -38,109 +88,99 @@ async def subscriptions_page(request: Request):
 
 # --- HTMX partial routes ---
 
+# Each today-list renders as <ul id="{name}-items"> plus an "{name}-empty" placeholder and a
+# "{name}-count" badge. Adds return only the new <li> (the forms swap it in beforeend) and
+# refresh the placeholder and badge out of band, so an add costs the same at any list length.
+# The markup lives in the macros of templates/partials/today.html (see app/fragments.py).
+
+EMPTY_TEXT = {
+    "food": "Nothing logged yet.",
+    "training": "No training logged yet.",
+    "mental": "No notes yet.",
+    "reminders": "No reminders.",
+}
+
+# list name -> (row macro, the values it renders from a row)
+ROWS = {
+    "food": ("food_item", lambda i: (i.id, i.description, i.meal_type)),
+    "training": ("training_item", lambda i: (i.id, i.activity, i.duration_minutes)),
+    "mental": ("mental_item", lambda i: (i.id, i.content)),
+    "reminders": ("reminder_item", lambda r: (r.id, r.text)),
+}
+
+def _render_rows(name: str, items):
+    macro, values = ROWS[name]
+    return fragments.rows("today", macro, [values(i) for i in items])
+
+def _render_list(name: str, items):
+    return fragments.macros("today").item_list(name, _render_rows(name, items), EMPTY_TEXT[name], len(items))
+
+def _render_change(name: str, items=()):
+    """The new/changed <li>s (none to just remove one) plus out-of-band placeholder and badge"""
+    return fragments.macros("today").change(name, _render_rows(name, items), EMPTY_TEXT[name], today_state.count(name))
+
 def _render_food(items):
-    if not items:
-        return '<p class="text-slate-500 text-sm">Nothing logged yet.</p>'
-    rows = "".join(f'<li class="text-sm text-slate-300 py-1 border-b border-slate-700">{i.description}{" · <span class=\'text-slate-500\'>" + i.meal_type + "</span>" if i.meal_type else ""}</li>' for i in items)
-    return f"<ul>{rows}</ul>"
+    return _render_list("food", items)
 
 def _render_training(items):
-    if not items:
-        return '<p class="text-slate-500 text-sm">No training logged yet.</p>'
-    rows = "".join(f'<li class="text-sm text-slate-300 py-1 border-b border-slate-700">{i.activity}{" · " + str(i.duration_minutes) + "min" if i.duration_minutes else ""}</li>' for i in items)
-    return f"<ul>{rows}</ul>"
+    return _render_list("training", items)
 
 def _render_mental(items):
-    if not items:
-        return '<p class="text-slate-500 text-sm">No notes yet.</p>'
-    rows = "".join(f'<li class="text-sm text-slate-300 py-1 border-b border-slate-700">{i.content}</li>' for i in items)
-    return f"<ul>{rows}</ul>"
+    return _render_list("mental", items)
 
 def _render_reminders(items):
-    if not items:
-        return '<p class="text-slate-500 text-sm">No reminders.</p>'
-    rows = "".join(
-        f'<li class="text-sm text-slate-300 py-1 border-b border-slate-700 flex justify-between">'
-        f'<span>{r.text}</span>'
-        f'<button hx-patch="/partials/reminders/{r.id}/done" hx-target="#reminder-list" hx-swap="innerHTML" class="text-xs text-green-500 hover:text-green-300">✓</button>'
-        f'</li>'
-        for r in items if r.status == ReminderStatus.PENDING
-    )
-    return f"<ul>{rows}</ul>" if rows else '<p class="text-slate-500 text-sm">All done! ✓</p>'
-
-@router.get("/partials/food", response_class=HTMLResponse)
-async def partial_food(session: Session = Depends(get_session)):
-    today_start = datetime.combine(date.today(), time.min)
-    items = session.exec(select(FoodLog).where(FoodLog.logged_at >= today_start)).all()
-    return _render_food(items)
+    return _render_list("reminders", [r for r in items if r.status == ReminderStatus.PENDING])
+
+@router.get("/partials/food", response_class=HTMLResponse, dependencies=[Depends(conditional("foodlog", daily=True))])
+async def partial_food():
+    return _render_food((await today_state.current_async()).food)
 
 @router.post("/partials/food", response_class=HTMLResponse)
-async def partial_food_add(description: str = Form(...), meal_type: str = Form(default=None), session: Session = Depends(get_session)):
-    entry = FoodLog(description=description, meal_type=meal_type or None)
-    session.add(entry)
-    session.commit()
-    today_start = datetime.combine(date.today(), time.min)
-    items = session.exec(select(FoodLog).where(FoodLog.logged_at >= today_start)).all()
-    return _render_food(items)
-
-@router.get("/partials/training", response_class=HTMLResponse)
-async def partial_training(session: Session = Depends(get_session)):
-    today_start = datetime.combine(date.today(), time.min)
-    items = session.exec(select(TrainingLog).where(TrainingLog.logged_at >= today_start)).all()
-    return _render_training(items)
+def partial_food_add(description: str = Form(...), meal_type: str = Form(default=None), session: Session = Depends(get_session)):
+    entry = save(session, FoodLog(description=description, meal_type=meal_type or None))
+    return _render_change("food", [entry])
+
+@router.get("/partials/training", response_class=HTMLResponse, dependencies=[Depends(conditional("traininglog", daily=True))])
+async def partial_training():
+    return _render_training((await today_state.current_async()).training)
 
 @router.post("/partials/training", response_class=HTMLResponse)
-async def partial_training_add(activity: str = Form(...), duration_minutes: Optional[int] = Form(default=None), session: Session = Depends(get_session)):
-    entry = TrainingLog(activity=activity, duration_minutes=duration_minutes)
-    session.add(entry)
-    session.commit()
-    today_start = datetime.combine(date.today(), time.min)
-    items = session.exec(select(TrainingLog).where(TrainingLog.logged_at >= today_start)).all()
-    return _render_training(items)
-
-@router.get("/partials/mental", response_class=HTMLResponse)
-async def partial_mental(session: Session = Depends(get_session)):
-    today_start = datetime.combine(date.today(), time.min)
-    items = session.exec(select(MentalLog).where(MentalLog.logged_at >= today_start)).all()
-    return _render_mental(items)
+def partial_training_add(activity: str = Form(...), duration_minutes: Optional[int] = Form(default=None), session: Session = Depends(get_session)):
+    entry = save(session, TrainingLog(activity=activity, duration_minutes=duration_minutes))
+    return _render_change("training", [entry])
+
+@router.get("/partials/mental", response_class=HTMLResponse, dependencies=[Depends(conditional("mentallog", daily=True))])
+async def partial_mental():
+    return _render_mental((await today_state.current_async()).mental)
 
 @router.post("/partials/mental", response_class=HTMLResponse)
-async def partial_mental_add(content: str = Form(...), session: Session = Depends(get_session)):
-    entry = MentalLog(content=content)
-    session.add(entry)
-    session.commit()
-    today_start = datetime.combine(date.today(), time.min)
-    items = session.exec(select(MentalLog).where(MentalLog.logged_at >= today_start)).all()
-    return _render_mental(items)
-
-@router.get("/partials/reminders", response_class=HTMLResponse)
-async def partial_reminders(session: Session = Depends(get_session)):
-    items = session.exec(select(Reminder).where(Reminder.status == ReminderStatus.PENDING)).all()
-    return _render_reminders(items)
+def partial_mental_add(content: str = Form(...), session: Session = Depends(get_session)):
+    entry = save(session, MentalLog(content=content))
+    return _render_change("mental", [entry])
+
+@router.get("/partials/reminders", response_class=HTMLResponse, dependencies=[Depends(conditional("reminder"))])
+async def partial_reminders():
+    return _render_reminders((await today_state.current_async()).reminders)
 
 @router.post("/partials/reminders", response_class=HTMLResponse)
-async def partial_reminders_add(text: str = Form(...), due_at: Optional[str] = Form(default=None), session: Session = Depends(get_session)):
+def partial_reminders_add(text: str = Form(...), due_at: Optional[str] = Form(default=None), session: Session = Depends(get_session)):
     due = datetime.fromisoformat(due_at) if due_at else None
-    entry = Reminder(text=text, due_at=due)
-    session.add(entry)
-    session.commit()
-    items = session.exec(select(Reminder).where(Reminder.status == ReminderStatus.PENDING)).all()
-    return _render_reminders(items)
+    reminder = save(session, Reminder(text=text, due_at=due))
+    return _render_change("reminders", [reminder])
 
 @router.patch("/partials/reminders/{id}/done", response_class=HTMLResponse)
-async def partial_reminders_done(id: int, session: Session = Depends(get_session)):
+def partial_reminders_done(id: int, session: Session = Depends(get_session)):
     r = session.get(Reminder, id)
     if r:
         r.status = ReminderStatus.DONE
         r.completed_at = datetime.utcnow()
         session.commit()
-    items = session.exec(select(Reminder).where(Reminder.status == ReminderStatus.PENDING)).all()
-    return _render_reminders(items)
+    return _render_change("reminders")
 
-@router.get("/partials/history", response_class=HTMLResponse)
-async def partial_history(session: Session = Depends(get_session)):
-    food = session.exec(select(FoodLog).order_by(FoodLog.logged_at.desc()).limit(20)).all()
-    training = session.exec(select(TrainingLog).order_by(TrainingLog.logged_at.desc()).limit(10)).all()
+@router.get("/partials/history", response_class=HTMLResponse, dependencies=[Depends(conditional("foodlog", "traininglog"))])
+async def partial_history(session: AsyncSession = Depends(get_async_session)):
+    food = (await session.exec(select(FoodLog).order_by(FoodLog.logged_at.desc()).limit(20))).all()
+    training = (await session.exec(select(TrainingLog).order_by(TrainingLog.logged_at.desc()).limit(10))).all()
     parts = []
     if food:
         rows = "".join(f'<li class="text-sm text-slate-300 py-1">{i.logged_at.strftime("%d/%m %H:%M")} — {i.description}</li>' for i in food)
@@ -155,102 +195,113 @@ async def partial_calendar_today():
     """Get today's calendar events (legacy, redirects to calendar-day)"""
     return await partial_calendar_day(0)
 
+CALENDAR_NOT_CONNECTED = '<p class="text-slate-500 text-sm">Calendar not connected. <a href="/api/calendar/auth" class="text-cyan-400 hover:underline">Connect Google Calendar</a></p>'
+CALENDAR_PREFETCH = (1, 2)  # the other day tabs in index.html
+
+_calendar_days: dict = {}      # (offset, day) -> (calendarevent version, rendered html)
+_calendar_inflight: dict = {}  # (offset, day) -> task rendering it on the calendar pool
+_calendar_prefetches: set = set()
+
 @router.get("/partials/calendar-day", response_class=HTMLResponse)
 async def partial_calendar_day(offset: int = 0):
-    """Get calendar events for a specific day (0=today, 1=tomorrow, etc.)"""
+    """Get calendar events for a specific day (0=today, 1=tomorrow, etc.)
+
+    Rendering today also renders the other tabs in the background, so switching to them is
+    served from memory.
+    """
+    if offset == 0:
+        for ahead in CALENDAR_PREFETCH:
+            task = asyncio.ensure_future(_calendar_day_cached(ahead))
+            _calendar_prefetches.add(task)
+            task.add_done_callback(_calendar_prefetches.discard)
+    return await _calendar_day_cached(offset)
+
+async def _calendar_day_cached(offset: int):
+    """The rendered day, reused until the mirror changes; the last good render if loading fails"""
+    key = (offset, date.today())
+    version = versions.get("calendarevent")
+    cached = _calendar_days.get(key)
+    if cached is not None and cached[0] == version:
+        metrics.inc("calendar.days.hits")
+        return cached[1]
+    task = _calendar_inflight.get(key)
+    if task is None:
+        task = _calendar_inflight[key] = asyncio.ensure_future(calendar_client.call(_calendar_day, offset))
+        task.add_done_callback(lambda _: _calendar_inflight.pop(key, None))
     try:
-        from app.routers.calendar import get_credentials
-        from googleapiclient.discovery import build
-        from datetime import timedelta
-        
-        creds = get_credentials()
-        if not creds:
-            return '<p class="text-slate-500 text-sm">Calendar not connected. <a href="/api/calendar/auth" class="text-cyan-400 hover:underline">Connect Google Calendar</a></p>'
-        
-        service = build('calendar', 'v3', credentials=creds)
-        target_date = date.today() + timedelta(days=offset)
-        next_date = target_date + timedelta(days=1)
-        
-        # Date label
-        if offset == 0:
-            date_label = "Today"
-        elif offset == 1:
-            date_label = "Tomorrow"
-        else:
-            date_label = target_date.strftime('%A, %d %b')
-        
-        # Get events for target date
-        day_start = datetime.combine(target_date, time.min).isoformat() + 'Z'
-        day_end = datetime.combine(next_date, time.min).isoformat() + 'Z'
-        
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=day_start,
-            timeMax=day_end,
-            maxResults=20,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        
-        header = f'<p class="text-slate-400 text-xs mb-2">{date_label} — {target_date.strftime("%d/%m/%Y")}</p>'
-        
-        if not events:
-            return header + f'<p class="text-slate-500 text-sm">No events scheduled ✨</p>'
-        
-        rows = []
-        for e in events:
-            start = e.get('start', {})
-            start_time = start.get('dateTime', start.get('date', ''))
-            
-            # Format time
-            if 'T' in start_time:
-                dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                time_str = dt.strftime('%H:%M')
-            else:
-                time_str = 'All day'
-            
-            summary = e.get('summary', '(No title)')
-            location = e.get('location', '')
-            
-            loc_html = f'<span class="text-slate-500 text-xs ml-2">📍 {location[:30]}</span>' if location else ''
-            
-            rows.append(f'''
-                <li class="flex items-center gap-3 py-2 border-b border-slate-700 last:border-0">
-                    <span class="text-cyan-400 font-mono text-sm w-14">{time_str}</span>
-                    <span class="text-slate-200 text-sm flex-1">{summary}</span>
-                    {loc_html}
-                </li>
-            ''')
-        
-        return header + f'<ul>{"".join(rows)}</ul>'
-        
+        html = await asyncio.shield(task)  # a cancelled caller mustn't cancel the render others wait on
     except Exception as ex:
-        return f'<p class="text-red-400 text-sm">Error loading calendar: {str(ex)[:100]}</p>'
+        if cached is not None:
+            metrics.inc("calendar.days.stale")
+            return cached[1]
+        reason = "timed out" if isinstance(ex, asyncio.TimeoutError) else str(ex)[:100]
+        return f'<p class="text-red-400 text-sm">Error loading calendar: {escape(reason)}</p>'
+    if html is None:
+        return CALENDAR_NOT_CONNECTED
+    metrics.inc("calendar.days.renders")
+    for old in [k for k in _calendar_days if k[1] < key[1]]:
+        del _calendar_days[old]
+    _calendar_days[key] = (version, html)
+    return html
 
-@router.get("/partials/stats-cards", response_class=HTMLResponse)
-async def partial_stats_cards(session: Session = Depends(get_session)):
-    from datetime import timedelta
-    from sqlmodel import func
+def _calendar_day(offset: int):
+    """Render one day from the local mirror, or None if not connected. Runs on the calendar pool:
+    a mirror that has never been synced is filled from Google first."""
+    if not calendar_client.connected():
+        return None
+    calendar_sync.ensure_synced()
     
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())
-    month_start = today.replace(day=1)
-    week_start_dt = datetime.combine(week_start, time.min)
-    month_start_dt = datetime.combine(month_start, time.min)
+    target_date = date.today() + timedelta(days=offset)
+    next_date = target_date + timedelta(days=1)
+    
+    # Date label
+    if offset == 0:
+        date_label = "Today"
+    elif offset == 1:
+        date_label = "Tomorrow"
+    else:
+        date_label = target_date.strftime('%A, %d %b')
     
-    trainings_week = session.exec(select(func.count(TrainingLog.id)).where(TrainingLog.logged_at >= week_start_dt)).one()
-    trainings_month = session.exec(select(func.count(TrainingLog.id)).where(TrainingLog.logged_at >= month_start_dt)).one()
+    # Get events for target date
+    with Session(get_read_engine()) as session:
+        events = calendar_sync.events_between(
+            session,
+            datetime.combine(target_date, time.min),
+            datetime.combine(next_date, time.min),
+            limit=20,
+        )
     
-    latest_weight = session.exec(select(WeightLog).order_by(WeightLog.logged_at.desc())).first()
-    weight_30d_ago = session.exec(select(WeightLog).where(WeightLog.logged_at <= today - timedelta(days=30)).order_by(WeightLog.logged_at.desc())).first()
+    rows = []
+    for e in events:
+        # Format time
+        if not e.all_day:
+            dt = datetime.fromisoformat(e.start.replace('Z', '+00:00'))
+            time_str = dt.strftime('%H:%M')
+        else:
+            time_str = 'All day'
+        
+        rows.append((e.id, time_str, e.summary or '(No title)', e.location or ''))
+    
+    calendar = fragments.macros("calendar")
+    return calendar.day(date_label, target_date.strftime("%d/%m/%Y"), fragments.rows("calendar", "event_row", rows))
+
+def _stats_cards(session: Session):
+    today = date.today()
+    trainings_week, trainings_month = training_counts(session, today)
+    
+    weight = trend.get_trend(session).summary()
+    latest_weight = weight["latest"]
     
     weight_change = ""
-    if latest_weight and weight_30d_ago:
-        diff = latest_weight.weight_kg - weight_30d_ago.weight_kg
+    if weight["change_30d"] is not None:
+        diff = weight["change_30d"]
         sign = "+" if diff > 0 else ""
         weight_change = f'<span class="text-xs {"text-red-400" if diff > 0 else "text-green-400"}">{sign}{diff:.1f} kg</span>'
+    weight_pace = ""
+    if weight["slope_kg_per_week"] is not None:
+        weight_pace = f'<div class="text-slate-500 text-xs">trend {weight["smoothed"]:.1f} kg, {weight["slope_kg_per_week"]:+.2f} kg/wk</div>'
+    if weight["goal_date"]:
+        weight_pace += f'<div class="text-slate-500 text-xs">goal {weight["goal_kg"]:g} kg by {date.fromisoformat(weight["goal_date"]).strftime("%d %b %Y")}</div>'
     
     return f'''
     <div class="bg-slate-800 rounded-lg p-4 text-center">
@@ -262,8 +313,9 @@ async def partial_stats_cards(session: Session = Depends(get_session)):
         <div class="text-slate-400 text-sm">Trainings this month</div>
     </div>
     <div class="bg-slate-800 rounded-lg p-4 text-center">
-        <div class="text-3xl font-bold text-purple-400">{latest_weight.weight_kg if latest_weight else "—"}</div>
+        <div class="text-3xl font-bold text-purple-400">{latest_weight if latest_weight else "—"}</div>
         <div class="text-slate-400 text-sm">Latest weight (kg) {weight_change}</div>
+        {weight_pace}
     </div>
     <div class="bg-slate-800 rounded-lg p-4 text-center">
         <div class="text-3xl font-bold text-amber-400">{today.strftime("%d %b")}</div>
@@ -271,8 +323,12 @@ async def partial_stats_cards(session: Session = Depends(get_session)):
     </div>
     '''
 
+@router.get("/partials/stats-cards", response_class=HTMLResponse, dependencies=[Depends(conditional("daily_rollup", "weightlog", daily=True))])
+async def partial_stats_cards():
+    return await run_read(_stats_cards)
+
 @router.post("/partials/weight", response_class=HTMLResponse)
-async def partial_weight_add(weight_kg: float = Form(...), notes: Optional[str] = Form(default=None), session: Session = Depends(get_session)):
+def partial_weight_add(weight_kg: float = Form(...), notes: Optional[str] = Form(default=None), session: Session = Depends(get_session)):
     today = date.today()
     existing = session.exec(select(WeightLog).where(WeightLog.logged_at == today)).first()
     if existing:
@@ -284,87 +340,49 @@ async def partial_weight_add(weight_kg: float = Form(...), notes: Optional[str]
         session.add(entry)
         session.commit()
     # Return updated stats cards
-    return await partial_stats_cards(session)
+    return _stats_cards(session)
 
 # --- Subscriptions partials ---
 
-@router.get("/partials/subscriptions-list", response_class=HTMLResponse)
-async def partial_subscriptions_list(session: Session = Depends(get_session)):
-    subs = session.exec(
+@router.get("/partials/subscriptions-list", response_class=HTMLResponse, dependencies=[Depends(conditional("subscription"))])
+async def partial_subscriptions_list(session: AsyncSession = Depends(get_async_session)):
+    subs = (await session.exec(
         select(Subscription).where(Subscription.active == True).order_by(Subscription.category, Subscription.name)
-    ).all()
+    )).all()
     
     if not subs:
         return '<p class="text-slate-500 text-sm">No subscriptions yet. Add your first one!</p>'
     
-    # Calculate totals
-    monthly_total = 0.0
-    for sub in subs:
-        price = sub.my_price if sub.my_price is not None else sub.full_price
-        if sub.billing_cycle == BillingCycle.MONTHLY:
-            monthly_total += price
-        elif sub.billing_cycle == BillingCycle.YEARLY:
-            monthly_total += price / 12
-        elif sub.billing_cycle == BillingCycle.WEEKLY:
-            monthly_total += price * 4.33
-    
-    rows = []
-    for sub in subs:
-        price = sub.my_price if sub.my_price is not None else sub.full_price
-        shared_badge = f'<span class="text-xs bg-blue-900 text-blue-300 px-1.5 py-0.5 rounded ml-2">shared</span>' if sub.is_shared else ''
-        shared_with = f'<span class="text-slate-500 text-xs ml-1">w/ {sub.shared_with}</span>' if sub.shared_with else ''
-        cycle_text = sub.billing_cycle.value[:3] if sub.billing_cycle else 'mo'
-        
-        rows.append(f'''
-            <tr class="border-b border-slate-700 hover:bg-slate-800">
-                <td class="py-3 px-2">
-                    <span class="text-slate-200">{sub.name}</span>
-                    {shared_badge}{shared_with}
-                </td>
-                <td class="py-3 px-2 text-right">
-                    <span class="text-cyan-400 font-mono">€{price:.2f}</span>
-                    <span class="text-slate-500 text-xs">/{cycle_text}</span>
-                </td>
-                <td class="py-3 px-2 text-center">
-                    <span class="text-xs bg-slate-700 text-slate-300 px-2 py-0.5 rounded">{sub.category.value if sub.category else 'other'}</span>
-                </td>
-                <td class="py-3 px-2 text-right">
-                    <button hx-delete="/api/subscriptions/{sub.id}" hx-target="#subscriptions-list" hx-swap="innerHTML"
-                            hx-confirm="Cancel {sub.name}?" 
-                            class="text-red-400 hover:text-red-300 text-sm">✕</button>
-                </td>
-            </tr>
-        ''')
+    monthly_total = (await costs.totals_async(session))["monthly"]
     
-    return f'''
-        <div class="mb-4 text-right">
-            <span class="text-slate-400">Monthly total:</span>
-            <span class="text-2xl font-bold text-cyan-400 ml-2">€{monthly_total:.2f}</span>
-        </div>
-        <table class="w-full">
-            <thead>
-                <tr class="text-left text-slate-400 text-sm border-b border-slate-600">
-                    <th class="pb-2 px-2">Service</th>
-                    <th class="pb-2 px-2 text-right">Cost</th>
-                    <th class="pb-2 px-2 text-center">Category</th>
-                    <th class="pb-2 px-2"></th>
-                </tr>
-            </thead>
-            <tbody>
-                {"".join(rows)}
-            </tbody>
-        </table>
-    '''
+    rows = fragments.rows("subscriptions", "subscription_row", [
+        (
+            sub.id,
+            sub.name,
+            costs.effective_price(sub),
+            sub.billing_cycle.value[:3] if sub.billing_cycle else 'mo',
+            sub.category.value if sub.category else 'other',
+            sub.is_shared,
+            sub.shared_with,
+        )
+        for sub in subs
+    ])
+    return fragments.macros("subscriptions").subscriptions_table(monthly_total, rows)
+
+@router.get("/partials/subscriptions-forecast", response_class=HTMLResponse, dependencies=[Depends(conditional("subscription", daily=True))])
+async def partial_subscriptions_forecast(session: AsyncSession = Depends(get_async_session)):
+    forecast = await costs.projection_async(session, 12)
+    return fragments.macros("subscriptions").forecast(forecast["total"], forecast["by_month"], forecast["charges"][:5], len(forecast["unscheduled"]))
 
-@router.get("/partials/suggestions-box", response_class=HTMLResponse)
-async def partial_suggestions_box(category: str = "subscriptions", session: Session = Depends(get_session)):
-    suggestions = session.exec(
+@router.get("/partials/suggestions-box", response_class=HTMLResponse, dependencies=[Depends(conditional("suggestion"))])
+async def partial_suggestions_box(category: str = "subscriptions", session: AsyncSession = Depends(get_async_session)):
+    suggestions = (await session.exec(
         select(Suggestion)
         .where(Suggestion.category == category)
         .where(Suggestion.dismissed == False)
         .order_by(Suggestion.priority.desc(), Suggestion.created_at.desc())
         .limit(5)
-    ).all()
+    )).all()
     
     if not suggestions:
         return '''
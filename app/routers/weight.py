@@ -5,6 +5,7 @@ from datetime import date as date_type
 from app.database import get_session
 from app.models import WeightLog
 from app.auth import require_api_key
+from app.versions import conditional
 
 router = APIRouter(prefix="/weight", tags=["weight"])
 
@@ -23,7 +24,7 @@ def create_weight(entry: WeightLog, session: Session = Depends(get_session)):
     session.refresh(entry)
     return entry
 
-@router.get("")
+@router.get("", dependencies=[Depends(conditional("weightlog", daily=True))])
 def list_weight(days: Optional[int] = 30, session: Session = Depends(get_session)):
     """Get weight entries for the last N days"""
     from datetime import timedelta
@@ -35,7 +36,7 @@ def list_weight(days: Optional[int] = 30, session: Session = Depends(get_session
     ).all()
     return entries
 
-@router.get("/latest")
+@router.get("/latest", dependencies=[Depends(conditional("weightlog"))])
 def get_latest_weight(session: Session = Depends(get_session)):
     """Get the most recent weight entry"""
     entry = session.exec(select(WeightLog).order_by(WeightLog.logged_at.desc())).first()
@@ -0,0 +1,299 @@
+"""Due-reminder scheduler.
+
+Pending reminders with a `due_at` that haven't fired yet sit in a min-heap of
+(due_at, id). It is filled once at startup from an index search
+(ix_reminder_status_notified_due) and then kept current by the same session
+hooks app/today.py uses: reminders touched by a flush are collected in
+after_flush and applied in after_commit (dropped on rollback), so the routers,
+the UI partials and the write queue all reach it, each change costing one
+O(log n) push. A moved or finished reminder isn't searched for in the heap;
+`entries` holds the deadline each id is due at now and heap items that don't
+match it are skipped when they surface (the heap is rebuilt from `entries`
+once stale items outnumber live ones). Bulk ORM statements on the reminder
+table can't be replayed and reload it instead.
+
+A thread sleeps until the earliest deadline (or until a change brings it
+forward), stamps the due reminders' `notified_at` and publishes each one on
+GET /reminders/events (server-sent events) and, when `reminder_webhook_url`
+is set, POSTs it there as JSON. Changing `due_at` clears `notified_at`, so a
+rescheduled reminder fires again. If firing fails (e.g. the database is
+locked) the reminders go back on the heap and the thread backs off, from
+RETRY_MIN_S doubling up to RETRY_MAX_S. `due_at` is naive UTC like every other
+timestamp.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+from app import metrics
+from app.config import settings
+from app.models import Reminder, ReminderStatus
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+RETRY_MIN_S = 1.0  # first wait after a failed fire, doubled per consecutive failure
+RETRY_MAX_S = 60.0
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+def _deadline(reminder: Reminder) -> Optional[datetime]:
+    """When a reminder should fire, or None if it shouldn't be scheduled"""
+    if reminder.status != ReminderStatus.PENDING or reminder.notified_at is not None or not isinstance(reminder.due_at, datetime):
+        return None
+    return _naive_utc(reminder.due_at)
+
+def pending_statement():
+    return (
+        select(Reminder.id, Reminder.due_at)
+        .where(Reminder.status == ReminderStatus.PENDING)
+        .where(Reminder.notified_at == None)
+        .where(Reminder.due_at != None)
+    )
+
+class Subscribers:
+    """Event-stream listeners: one asyncio queue per open GET /reminders/events"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues: set = set()
+
+    def subscribe(self) -> tuple:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self.lock:
+            self.queues.add(entry)
+        return entry
+
+    def unsubscribe(self, entry: tuple):
+        with self.lock:
+            self.queues.discard(entry)
+
+    def publish(self, payload: dict):
+        """Hand a payload to every listener; callable from any thread"""
+        with self.lock:
+            entries = list(self.queues)
+        for loop, queue in entries:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, payload)
+            except RuntimeError:  # the listener's loop has closed
+                self.unsubscribe((loop, queue))
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, payload: dict):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            metrics.inc("reminders.events.dropped")
+
+class ReminderScheduler:
+    """Min-heap of pending deadlines and the thread that fires them"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.stopping = False
+        self.thread: Optional[threading.Thread] = None
+        self.heap: list = []  # (due_at, id), possibly stale
+        self.entries: dict = {}  # id -> due_at it is scheduled for
+        self.retry_at: Optional[datetime] = None  # nothing fires before this after a failure
+        self.failures = 0
+        self.subscribers = Subscribers()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping = False
+        self.rebuild()
+        self.thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        with self.changed:
+            self.stopping = True
+            self.changed.notify()
+        self.thread.join(timeout=5)
+        self.thread = None
+
+    def rebuild(self):
+        """Reload every pending deadline from the database"""
+        from app.database import get_read_engine
+        with Session(get_read_engine()) as session:
+            rows = session.exec(pending_statement()).all()
+        with self.changed:
+            self.entries = {id: _naive_utc(due_at) for id, due_at in rows}
+            self._heapify()
+            self.changed.notify()
+        metrics.inc("reminders.scheduler.rebuilds")
+
+    def apply(self, changes: dict):
+        """Schedule, move or drop reminders: {id: deadline or None}"""
+        if self.thread is None:
+            return
+        with self.changed:
+            head = self.heap[0][0] if self.heap else None
+            for id, due_at in changes.items():
+                if self.entries.get(id) == due_at:
+                    continue
+                if due_at is None:
+                    del self.entries[id]
+                else:
+                    self.entries[id] = due_at
+                    heapq.heappush(self.heap, (due_at, id))
+            if len(self.heap) > 2 * len(self.entries) + 64:
+                self._heapify()
+            if self.heap and (head is None or self.heap[0][0] < head):
+                self.changed.notify()
+
+    def next_due(self) -> Optional[datetime]:
+        with self.lock:
+            self._drop_stale()
+            return self.heap[0][0] if self.heap else None
+
+    def _heapify(self):
+        self.heap = [(due_at, id) for id, due_at in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def _drop_stale(self):
+        while self.heap and self.entries.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def _take_due(self, now: datetime) -> list[tuple]:
+        due = []
+        self._drop_stale()
+        while self.heap and self.heap[0][0] <= now:
+            due_at, id = heapq.heappop(self.heap)
+            del self.entries[id]
+            due.append((due_at, id))
+            self._drop_stale()
+        return due
+
+    def _retry(self, due: list[tuple]):
+        """Put back reminders whose fire failed and back off; `fire` re-checks each one, so any finished meanwhile are skipped"""
+        delay = min(RETRY_MIN_S * 2 ** self.failures, RETRY_MAX_S)
+        self.failures += 1
+        self.retry_at = datetime.utcnow() + timedelta(seconds=delay)
+        for due_at, id in due:
+            if id not in self.entries:
+                self.entries[id] = due_at
+                heapq.heappush(self.heap, (due_at, id))
+
+    def _run(self):
+        while True:
+            with self.changed:
+                while not self.stopping:
+                    now = datetime.utcnow()
+                    if self.retry_at is not None and now < self.retry_at:
+                        self.changed.wait((self.retry_at - now).total_seconds())
+                        continue
+                    due = self._take_due(now)
+                    if due:
+                        break
+                    wait = (self.heap[0][0] - now).total_seconds() if self.heap else None
+                    self.changed.wait(wait)
+                if self.stopping:
+                    return
+            try:
+                self.fire([id for _, id in due])
+            except Exception:
+                metrics.inc("reminders.scheduler.errors")
+                logger.exception("firing reminders %s failed, retrying", [id for _, id in due])
+                with self.changed:
+                    self._retry(due)
+            else:
+                self.failures, self.retry_at = 0, None
+
+    def fire(self, ids: list[int]):
+        """Stamp the reminders as notified and publish the ones still due"""
+        from app.database import get_engine
+        now = datetime.utcnow()
+        payloads = []
+        with Session(get_engine()) as session:
+            for reminder in session.exec(select(Reminder).where(Reminder.id.in_(ids))).all():
+                deadline = _deadline(reminder)
+                if deadline is None or deadline > now:
+                    continue  # finished or moved since it was taken off the heap
+                reminder.notified_at = now
+                session.add(reminder)
+                metrics.observe("reminders.lateness_ms", (now - deadline).total_seconds() * 1000)
+                payloads.append({
+                    "id": reminder.id,
+                    "text": reminder.text,
+                    "due_at": deadline.isoformat(),
+                    "notified_at": now.isoformat(),
+                })
+            session.commit()
+        for payload in payloads:
+            self.subscribers.publish(payload)
+            if settings.reminder_webhook_url:
+                self._post(payload)
+        metrics.inc("reminders.fired", len(payloads))
+
+    def _post(self, payload: dict):
+        request = urllib.request.Request(
+            settings.reminder_webhook_url,
+            data=json.dumps({"event": "reminder.due", "reminder": payload}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=settings.reminder_webhook_timeout_s) as response:
+                response.read()
+        except Exception as e:
+            metrics.inc("reminders.webhook.errors")
+            logger.warning("reminder webhook failed for reminder %s: %s", payload["id"], e)
+        else:
+            metrics.inc("reminders.webhook.sent")
+        metrics.observe("reminders.webhook_ms", (time.perf_counter() - started) * 1000)
+
+scheduler = ReminderScheduler()
+
+# --- Session hooks ---
+
+@event.listens_for(Reminder, "before_update")
+def _reschedule(mapper, connection, target):
+    if inspect(target).attrs.due_at.history.has_changes():
+        target.notified_at = None
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect(session, flush_context):
+    changes = session.info.setdefault("reminder_schedule", {})
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Reminder):
+            changes[obj.id] = _deadline(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Reminder):
+            changes[inspect(obj).identity[0]] = None
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _bulk(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name == Reminder.__tablename__:
+            orm_execute_state.session.info["reminder_reload"] = True
+
+@event.listens_for(OrmSession, "after_commit")
+def _publish(session):
+    changes = session.info.pop("reminder_schedule", None)
+    if session.info.pop("reminder_reload", False):
+        if scheduler.thread is not None:
+            scheduler.rebuild()
+    elif changes:
+        scheduler.apply(changes)
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    session.info.pop("reminder_schedule", None)
+    session.info.pop("reminder_reload", None)
@@ -0,0 +1,129 @@
+"""Suggestion deduplication and compaction.
+
+Every suggestion carries `content_hash`, a hash of its normalized content
+(case-folded, whitespace collapsed, trailing punctuation dropped), unique per
+category. Inserts go through `upsert`: one INSERT ... ON CONFLICT DO UPDATE
+that turns a re-posted suggestion into an update of the existing row -- its
+wording and created_at are refreshed and its priority raised if the new one
+is higher, while a dismissal sticks.
+
+`compact` deletes dismissed suggestions older than `suggestion_dismissed_ttl_days`
+and undismissed ones nobody has re-posted for `suggestion_stale_ttl_days`; a
+background thread runs it every `suggestion_compact_interval_s`.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, event, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session
+from app import metrics
+from app.config import settings
+from app.models import Suggestion
+
+logger = logging.getLogger(__name__)
+
+def normalize(content: str) -> str:
+    return " ".join(content.casefold().split()).rstrip(" .!?")
+
+def content_hash(content: str) -> str:
+    return hashlib.blake2b(normalize(content).encode(), digest_size=16).hexdigest()
+
+@event.listens_for(Suggestion, "before_insert")
+@event.listens_for(Suggestion, "before_update")
+def _store_hash(mapper, connection, target):
+    target.content_hash = content_hash(target.content)
+
+def upsert(session: Session, rows: list[dict]) -> list[int]:
+    """Insert {category, content, priority} rows, merging each into an existing duplicate.
+
+    Returns the id each row ended up in, in input order (rows that duplicate each other share an id).
+    The caller commits.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    keys = [(row["category"], content_hash(row["content"])) for row in rows]
+    unique = {}
+    for key, row in zip(keys, rows):
+        merged = unique.get(key)
+        priority = max(row.get("priority", 0), merged["priority"]) if merged else row.get("priority", 0)
+        unique[key] = {**row, "priority": priority, "content_hash": key[1],
+                       "dismissed": False, "dismissed_at": None, "created_at": now}
+    stmt = insert(Suggestion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["category", "content_hash"],
+        set_={
+            "content": stmt.excluded.content,
+            "priority": func.max(Suggestion.priority, stmt.excluded.priority),
+            "created_at": stmt.excluded.created_at,
+        },
+    ).returning(Suggestion.id, Suggestion.category, Suggestion.content_hash)
+    # executemany: SQLAlchemy batches the rows into multi-row statements itself
+    ids = {(category, hash): id for id, category, hash in session.execute(stmt, list(unique.values()))}
+    metrics.inc("suggestions.upserted", len(rows))
+    metrics.inc("suggestions.merged", len(rows) - len(unique))
+    return [ids[key] for key in keys]
+
+# --- Compaction ---
+
+def compact(now: Optional[datetime] = None) -> dict:
+    """Delete expired dismissed and stale suggestions; returns the rows reclaimed"""
+    from app.database import get_engine
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    with Session(get_engine()) as session:
+        dismissed = session.execute(
+            delete(Suggestion)
+            .where(Suggestion.dismissed == True)
+            .where(Suggestion.dismissed_at < now - timedelta(days=settings.suggestion_dismissed_ttl_days))
+        ).rowcount
+        stale = session.execute(
+            delete(Suggestion)
+            .where(Suggestion.dismissed == False)
+            .where(Suggestion.created_at < now - timedelta(days=settings.suggestion_stale_ttl_days))
+        ).rowcount
+        session.commit()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    metrics.inc("suggestions.compactions")
+    metrics.inc("suggestions.compacted.dismissed", dismissed)
+    metrics.inc("suggestions.compacted.stale", stale)
+    metrics.observe("suggestions.compaction_ms", elapsed_ms)
+    if dismissed or stale:
+        logger.info("suggestion compaction reclaimed %d rows (%d dismissed, %d stale)", dismissed + stale, dismissed, stale)
+    return {"reclaimed": dismissed + stale, "dismissed": dismissed, "stale": stale, "ms": round(elapsed_ms, 1)}
+
+class Compactor:
+    """Background thread running `compact` every `suggestion_compact_interval_s`"""
+
+    def __init__(self):
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.last: Optional[dict] = None
+
+    def start(self):
+        if self.thread is not None or settings.suggestion_compact_interval_s <= 0:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="suggestion-compaction", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout=5)
+        self.thread = None
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                self.last = compact()
+            except Exception:
+                logger.exception("suggestion compaction failed")
+            self.stopping.wait(settings.suggestion_compact_interval_s)
+
+compactor = Compactor()
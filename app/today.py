@@ -0,0 +1,194 @@
+"""Write-through in-memory copy of today's dashboard data.
+
+Holds today's food, training and mental entries, the pending reminders and
+today's DailySummary, so the dashboard and the today-partials are served with
+no SQL at all. Every ORM write reaches it through the same session hooks the
+change counters use: rows touched by a flush are snapshotted in after_flush
+and applied in after_commit (dropped on rollback), which covers the routers,
+the UI partials and the write queue alike. Core writes (the importer) and bulk
+ORM statements can't be replayed, so they call `invalidate` and the next read
+reloads.
+
+The first read after local midnight reloads for the new day. Setting
+`today_consistency_check` makes every read compare the memory copy against the
+database and raise on a mismatch -- meant for tests, not production.
+"""
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.models import FoodLog, TrainingLog, MentalLog, Reminder, ReminderStatus, DailySummary
+
+MAX_RELOAD_ATTEMPTS = 3
+
+@dataclass
+class Today:
+    day: date
+    food: list = field(default_factory=list)
+    training: list = field(default_factory=list)
+    mental: list = field(default_factory=list)
+    reminders: list = field(default_factory=list)
+    summary: Optional[DailySummary] = None
+
+# model -> name of the Today list it lives in
+_LISTS = {FoodLog: "food", TrainingLog: "training", MentalLog: "mental", Reminder: "reminders"}
+_TRACKED = (*_LISTS, DailySummary)
+
+def _belongs(obj, day: date) -> bool:
+    if isinstance(obj, Reminder):
+        return obj.status == ReminderStatus.PENDING
+    if isinstance(obj, DailySummary):
+        return obj.summary_date == day
+    return datetime.combine(day, time.min) <= obj.logged_at <= datetime.combine(day, time.max)
+
+def _copy(obj):
+    """Detached copy, so later expiry or mutation of the session's object can't leak in"""
+    return type(obj).model_validate(obj.model_dump())
+
+def load(session: Session, day: date) -> Today:
+    start, end = datetime.combine(day, time.min), datetime.combine(day, time.max)
+    today = Today(day)
+    for model, name in _LISTS.items():
+        if model is Reminder:
+            query = select(Reminder).where(Reminder.status == ReminderStatus.PENDING)
+        else:
+            query = select(model).where(model.logged_at >= start).where(model.logged_at <= end)
+        setattr(today, name, session.exec(query.order_by(model.id)).all())
+    today.summary = session.exec(select(DailySummary).where(DailySummary.summary_date == day)).first()
+    return today
+
+class TodayState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.day: Optional[date] = None  # None until loaded, or after invalidate()
+        self.generation = 0
+        self.rows: dict = {}              # model -> {id: detached copy}
+        self.summary: Optional[DailySummary] = None
+
+    def snapshot(self) -> Optional[Today]:
+        with self.lock:
+            if self.day != date.today():
+                return None
+            today = Today(self.day, summary=self.summary)
+            for model, name in _LISTS.items():
+                rows = self.rows[model]
+                setattr(today, name, [rows[k] for k in sorted(rows)])
+            return today
+
+    def count(self, name: str) -> Optional[int]:
+        model = next(m for m, n in _LISTS.items() if n == name)
+        with self.lock:
+            return len(self.rows[model]) if self.day == date.today() else None
+
+    def reload(self) -> Today:
+        """Load today from the database; retried if a commit lands while loading"""
+        from app.database import get_read_engine
+        for _ in range(MAX_RELOAD_ATTEMPTS):
+            with self.lock:
+                generation = self.generation
+            day = date.today()
+            with Session(get_read_engine()) as session:
+                today = load(session, day)
+            with self.lock:
+                if self.generation == generation:
+                    self.day = day
+                    self.rows = {model: {row.id: row for row in getattr(today, name)} for model, name in _LISTS.items()}
+                    self.summary = today.summary
+                    return today
+        return today  # writes kept racing the load; serve it once, reload again next time
+
+    def apply(self, changes: dict):
+        """Apply {(model, id): copy or None for deleted} from one committed transaction"""
+        with self.lock:
+            self.generation += 1
+            if self.day is None:
+                return
+            for (model, id), obj in changes.items():
+                keep = obj is not None and _belongs(obj, self.day)
+                if model is DailySummary:
+                    if keep:
+                        self.summary = obj
+                    elif self.summary is not None and self.summary.id == id:
+                        self.summary = None
+                elif keep:
+                    self.rows[model][id] = obj
+                else:
+                    self.rows[model].pop(id, None)
+
+    def invalidate(self):
+        with self.lock:
+            self.generation += 1
+            self.day = None
+
+state = TodayState()
+
+def invalidate():
+    state.invalidate()
+
+def current() -> Today:
+    today = state.snapshot() or state.reload()
+    if settings.today_consistency_check:
+        check(today)
+    return today
+
+def count(name: str) -> int:
+    """Number of entries in one of today's lists, without copying it"""
+    n = state.count(name)
+    return n if n is not None and not settings.today_consistency_check else len(getattr(current(), name))
+
+async def current_async() -> Today:
+    today = state.snapshot()
+    if today is None or settings.today_consistency_check:
+        today = await run_in_threadpool(current)
+    return today
+
+def check(today: Today):
+    """Raise AssertionError if `today` differs from what the database holds"""
+    from app.database import get_read_engine
+    with Session(get_read_engine()) as session:
+        expected = load(session, today.day)
+    for name in (*_LISTS.values(), "summary"):
+        mine, theirs = getattr(today, name), getattr(expected, name)
+        mine = [r.model_dump() for r in mine] if isinstance(mine, list) else mine and mine.model_dump()
+        theirs = [r.model_dump() for r in theirs] if isinstance(theirs, list) else theirs and theirs.model_dump()
+        if mine != theirs:
+            raise AssertionError(f"today state out of sync for {name}: memory {mine!r}, database {theirs!r}")
+
+# --- Session hooks ---
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect(session, flush_context):
+    changes = session.info.setdefault("today_changes", {})
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, _TRACKED):
+            changes[(type(obj), obj.id)] = _copy(obj)
+    for obj in session.deleted:
+        if isinstance(obj, _TRACKED):
+            changes[(type(obj), inspect(obj).identity[0])] = None
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _bulk(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name in {model.__tablename__ for model in _TRACKED}:
+            orm_execute_state.session.info["today_invalidate"] = True
+
+# insert=True: runs before app/versions.py bumps the counters, so a reader that sees the new ETag
+# never renders the old state under it
+@event.listens_for(OrmSession, "after_commit", insert=True)
+def _publish(session):
+    changes = session.info.pop("today_changes", None)
+    if session.info.pop("today_invalidate", False):
+        state.invalidate()
+    elif changes:
+        state.apply(changes)
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    session.info.pop("today_changes", None)
+    session.info.pop("today_invalidate", None)
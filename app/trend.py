@@ -0,0 +1,182 @@
+"""Weight trend engine.
+
+The whole weight series is loaded once per data version into NumPy arrays
+(days since the first weigh-in, kg) and everything is computed vectorised on
+top of it:
+
+* a time-aware exponential moving average -- a gap of `dt` days decays the old
+  value by 0.5 ** (dt / half_life), so missed weigh-ins don't skew it;
+* a rolling least-squares slope over the trailing `window` days, built from
+  cumulative sums so each point costs O(1) whatever the window;
+* the date the smoothed weight reaches a goal at the current slope.
+
+Results are cached on the weightlog version (see app/versions.py), so a decade
+of daily weigh-ins is loaded and crunched once per write, not once per request.
+"""
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Optional
+import numpy as np
+from sqlmodel import Session, select, func
+from app import versions
+from app.config import settings
+from app.models import WeightLog
+
+MAX_CACHED = 16
+# exp() overflows float64 just past 709; the EMA is computed in blocks whose
+# accumulated decay stays below this
+_MAX_BLOCK_DECAY = 600.0
+_JULIAN_DAY_OF_ORDINAL_0 = 1721424.5
+GOAL_HORIZON_DAYS = 3650
+
+_lock = threading.Lock()
+_series = None  # (version, origin date, days, kg)
+_results: OrderedDict = OrderedDict()
+
+class Trend:
+    def __init__(self, origin: date, days: np.ndarray, kg: np.ndarray, smoothed: np.ndarray, slope: np.ndarray):
+        self.origin = origin
+        self.days = days          # float days since origin
+        self.kg = kg
+        self.smoothed = smoothed
+        self.slope = slope        # kg/day over the trailing window, NaN with fewer than 2 points
+
+    def __len__(self):
+        return len(self.days)
+
+    def date_at(self, i: int) -> date:
+        return self.origin + timedelta(days=int(self.days[i]))
+
+    def smoothed_change(self, days: int) -> Optional[float]:
+        """Change of the smoothed weight over the last `days` days"""
+        if len(self) < 2:
+            return None
+        i = int(np.searchsorted(self.days, self.days[-1] - days, "left"))
+        if i >= len(self) - 1:
+            return None
+        return float(self.smoothed[-1] - self.smoothed[i])
+
+    def goal_date(self, goal_kg: float) -> Optional[date]:
+        """When the smoothed weight reaches goal_kg at the current slope, or None if it's heading away"""
+        if not len(self):
+            return None
+        gap = goal_kg - self.smoothed[-1]
+        if abs(gap) < 0.05:
+            return self.date_at(-1)
+        rate = self.slope[-1]
+        if not np.isfinite(rate) or rate == 0 or math.copysign(1, rate) != math.copysign(1, gap):
+            return None
+        days = gap / rate
+        if days > GOAL_HORIZON_DAYS:
+            return None
+        return self.date_at(-1) + timedelta(days=math.ceil(days))
+
+    def summary(self, goal_kg: Optional[float] = None) -> dict:
+        """Latest values; goal_kg defaults to the configured weight_goal_kg"""
+        goal_kg = goal_kg if goal_kg is not None else settings.weight_goal_kg
+        if not len(self):
+            return {"latest": None, "smoothed": None, "slope_kg_per_week": None, "change_30d": None, "goal_kg": goal_kg, "goal_date": None}
+        slope = self.slope[-1]
+        change = self.smoothed_change(30)
+        goal = self.goal_date(goal_kg) if goal_kg is not None else None
+        return {
+            "latest": float(self.kg[-1]),
+            "smoothed": round(float(self.smoothed[-1]), 2),
+            "slope_kg_per_week": round(float(slope) * 7, 2) if np.isfinite(slope) else None,
+            "change_30d": round(change, 2) if change is not None else None,
+            "goal_kg": goal_kg,
+            "goal_date": str(goal) if goal else None,
+        }
+
+    def points(self, since: date) -> list[dict]:
+        start = int(np.searchsorted(self.days, (since - self.origin).days, "left"))
+        return [
+            {
+                "date": str(self.date_at(i)),
+                "weight": float(self.kg[i]),
+                "smoothed": round(float(self.smoothed[i]), 2),
+                "slope_kg_per_week": round(float(self.slope[i]) * 7, 2) if np.isfinite(self.slope[i]) else None,
+            }
+            for i in range(start, len(self))
+        ]
+
+def ema(days: np.ndarray, values: np.ndarray, half_life: float) -> np.ndarray:
+    """Time-aware EMA: out[i] = a*out[i-1] + (1-a)*values[i] with a = 0.5 ** (gap / half_life).
+
+    Unrolled, out[i] = exp(-L[i]) * (x[0] + sum_k (1-a[k]) * exp(L[k]) * x[k]) where L
+    is the cumulative decay, which is a cumsum; blocks restart the sum before exp(L)
+    can overflow.
+    """
+    n = len(values)
+    out = np.empty(n)
+    if not n:
+        return out
+    decay = np.diff(days, prepend=days[0]) * (math.log(2) / half_life)
+    total = np.cumsum(decay)
+    weight = -np.expm1(-decay)  # 1 - a, accurate for small gaps
+    out[0] = values[0]
+    start = 1
+    while start < n:
+        base = total[start - 1]
+        end = int(np.searchsorted(total, base + _MAX_BLOCK_DECAY, "right"))
+        if end <= start:  # a single gap longer than the block limit: step it directly
+            out[start] = math.exp(-decay[start]) * out[start - 1] + weight[start] * values[start]
+            start += 1
+            continue
+        grow = np.exp(total[start:end] - base)
+        out[start:end] = (out[start - 1] + np.cumsum(weight[start:end] * grow * values[start:end])) / grow
+        start = end
+    return out
+
+def rolling_slope(days: np.ndarray, values: np.ndarray, window: float) -> np.ndarray:
+    """Least-squares slope of values against days over each point's trailing `window` days."""
+    n = len(values)
+    first = np.searchsorted(days, days - window, "right")
+    last = np.arange(1, n + 1)
+    def window_sum(a):
+        c = np.concatenate(([0.0], np.cumsum(a)))
+        return c[last] - c[first]
+    count = (last - first).astype(float)
+    sx, sy = window_sum(days), window_sum(values)
+    sxx, sxy = window_sum(days * days), window_sum(days * values)
+    denominator = count * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (count * sxy - sx * sy) / denominator
+    slope[(count < 2) | (np.abs(denominator) < 1e-9)] = np.nan
+    return slope
+
+def _load(session: Session):
+    """(first day, days since it, kg) for every weigh-in, in one query"""
+    data = np.array(session.exec(
+        select(func.julianday(WeightLog.logged_at), WeightLog.weight_kg).order_by(WeightLog.logged_at.asc())
+    ).all(), dtype=float).reshape(-1, 2)
+    if not len(data):
+        return date.today(), np.empty(0), np.empty(0)
+    origin = date.fromordinal(int(data[0, 0] - _JULIAN_DAY_OF_ORDINAL_0))
+    return origin, data[:, 0] - data[0, 0], data[:, 1]
+
+def get_trend(session: Session, window_days: Optional[float] = None, half_life_days: Optional[float] = None) -> Trend:
+    """Trend over the full series, recomputed only when the weightlog version moves"""
+    global _series
+    window_days = window_days or settings.weight_trend_window_days
+    half_life_days = half_life_days or settings.weight_trend_half_life_days
+    version = versions.get("weightlog")
+    key = (version, float(window_days), float(half_life_days))
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+        series = _series if _series and _series[0] == version else None
+    if series is None:
+        # the version is read before loading, so a concurrent write can only make this entry stale-but-replaced
+        series = (version, *_load(session))
+    _, origin, days, kg = series
+    trend = Trend(origin, days, kg, ema(days, kg, half_life_days), rolling_slope(days, kg, window_days))
+    with _lock:
+        _series = series
+        _results[key] = trend
+        while len(_results) > MAX_CACHED:
+            _results.popitem(last=False)
+    return trend
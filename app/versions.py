@@ -0,0 +1,100 @@
+"""Per-table change counters.
+
+Every committed ORM write bumps the counters of the tables it touched (collected
+in after_flush, applied in after_commit so nobody can read a new version before
+the data behind it is visible). Writes that bypass the ORM call `bump` directly.
+Caches key their entries on these counters instead of expiring on a timer, and
+GET endpoints derive their ETag from them (`conditional`), so a revalidation
+that matches is answered with a 304 before any session is opened.
+
+Counters live in this process (the app runs as a single uvicorn process). A
+boot nonce in the ETag covers restarts; writes from another process, such as
+`python -m app.importer` against a live database, are not seen until restart,
+so prefer POST /api/import there.
+"""
+import secrets
+import threading
+import time
+from datetime import date
+from typing import Optional
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_lock = threading.Lock()
+_versions: dict[str, int] = {}
+BOOT = secrets.token_hex(4)
+CACHE_CONTROL = "private, no-cache"  # browsers may store, but must revalidate every time
+
+# Tables whose contents are derived from others in the same transaction
+DERIVED = {
+    "foodlog": ("daily_rollup",),
+    "traininglog": ("daily_rollup",),
+    "mentallog": ("daily_rollup",),
+    "weightlog": ("daily_rollup",),
+    "dailysummary": ("daily_rollup",),
+}
+
+def get(*tables: str) -> tuple:
+    with _lock:
+        return tuple(_versions.get(t, 0) for t in tables)
+
+def bump(*tables: str):
+    with _lock:
+        for table in tables:
+            for name in (table, *DERIVED.get(table, ())):
+                _versions[name] = _versions.get(name, 0) + 1
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            changed.add(table.name)
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state):
+    # bulk update()/delete() statements never show up in session.dirty/deleted
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault("changed_tables", set()).add(table.name)
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    changed = session.info.pop("changed_tables", None)
+    if changed:
+        bump(*changed)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    session.info.pop("changed_tables", None)
+
+def etag(tables: tuple, daily: bool = False, period_s: Optional[int] = None) -> str:
+    """Weak ETag over the given tables' versions; `daily` views also change at midnight,
+    `period_s` views (windows sliding with the clock) every period_s seconds"""
+    tag = f"{BOOT}-" + ".".join(map(str, get(*tables)))
+    if daily:
+        tag += f"-{date.today().isoformat()}"
+    if period_s:
+        tag += f"-{int(time.time() // period_s)}"
+    return f'W/"{tag}"'
+
+def _matches(header: str, tag: str) -> bool:
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == tag.removeprefix("W/") for c in candidates)
+
+def conditional(*tables: str, daily: bool = False, period_s: Optional[int] = None):
+    """Dependency for GET routes: 304 when If-None-Match still matches, else tag the response.
+
+    The tag is computed before the handler reads anything, so a write landing
+    in between can only make the tag older than the body, never newer.
+    """
+    def dependency(request: Request, response: Response):
+        tag = etag(tables, daily, period_s)
+        if _matches(request.headers.get("if-none-match", ""), tag):
+            raise HTTPException(status_code=304, headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
+        response.headers["ETag"] = tag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+    return dependency
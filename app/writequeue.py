@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sqlmodel import Session
+from app import metrics
+from app.config import settings
+from app.database import get_engine
+
+_STOP = object()
+
+class WriteQueue:
+    """Group commit for inserts: rows submitted from request threads are collected
+    for up to `max_delay_ms` or `max_rows`, then written in one transaction.
+
+    submit() blocks until the batch holding the row has committed and returns the
+    row with its assigned id, so each caller still gets a durable, per-row answer.
+    """
+
+    def __init__(self, max_rows: int, max_delay_ms: float):
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Flush whatever is queued and stop the flusher thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def submit(self, entry):
+        self.start()
+        future: Future = Future()
+        self._queue.put((entry, future))
+        return future.result()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            self._commit([entry for entry, _ in batch])
+        except Exception:
+            # One bad row must not fail the rest of the batch: retry them one by one
+            metrics.inc("write_queue.batch_retries")
+            for entry, future in batch:
+                try:
+                    self._commit([entry])
+                    future.set_result(entry)
+                except Exception as exc:
+                    future.set_exception(exc)
+        else:
+            for entry, future in batch:
+                future.set_result(entry)
+        metrics.inc("write_queue.flushes")
+        metrics.inc("write_queue.rows", len(batch))
+        metrics.observe("write_queue.flush_rows", len(batch))
+        metrics.observe("write_queue.flush_ms", (time.perf_counter() - started) * 1000)
+
+    def _commit(self, entries):
+        with Session(get_engine(), expire_on_commit=False) as session:
+            session.add_all(entries)
+            session.commit()
+
+write_queue = WriteQueue(settings.write_batch_max_rows, settings.write_batch_max_delay_ms)
+
+def save(session: Session, entry):
+    """Insert a new row and return it with its id, via the write queue when write-behind is enabled."""
+    if settings.write_behind:
+        return write_queue.submit(entry)
+    session.add(entry)
+    session.commit()
+    session.refresh(entry)
+    return entry
@@ -0,0 +1,132 @@
+"""Latency of /health and the HTMX partials under concurrent partial loads.
+
+Compares the old handler shape (``async def`` calling the synchronous
+``Session.exec`` on the event loop) with the async reader path now used by
+app/routers/ui.py. Runs in-process over ASGI, so anything that blocks the
+loop shows up directly in the /health numbers.
+
+    python scripts/bench_async_partials.py [--rows 20000] [--concurrency 12] [--rounds 10]
+
+Needs httpx (not a runtime dependency).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time as clock
+from datetime import date, datetime, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import httpx
+from fastapi import Depends, FastAPI
+from fastapi.responses import HTMLResponse
+from sqlmodel import Session, create_engine, select
+
+from app.config import settings
+from app.database import get_engine, init_db
+from app.models import FoodLog, TrainingLog, MentalLog, Reminder
+from app.routers import ui
+
+PARTIALS = ["/partials/food", "/partials/training", "/partials/mental", "/partials/reminders"]
+
+def blocking_app() -> FastAPI:
+    """The pre-async handlers and engine, kept here only as the 'before' baseline."""
+    app = FastAPI()
+    engine = create_engine(f"sqlite:///{settings.database_path}", connect_args={"check_same_thread": False})
+
+    def get_session():
+        with Session(engine) as session:
+            yield session
+
+    def today_start():
+        return datetime.combine(date.today(), time.min)
+
+    @app.get("/partials/food", response_class=HTMLResponse)
+    async def food(session: Session = Depends(get_session)):
+        return ui._render_food(session.exec(select(FoodLog).where(FoodLog.logged_at >= today_start())).all())
+
+    @app.get("/partials/training", response_class=HTMLResponse)
+    async def training(session: Session = Depends(get_session)):
+        return ui._render_training(session.exec(select(TrainingLog).where(TrainingLog.logged_at >= today_start())).all())
+
+    @app.get("/partials/mental", response_class=HTMLResponse)
+    async def mental(session: Session = Depends(get_session)):
+        return ui._render_mental(session.exec(select(MentalLog).where(MentalLog.logged_at >= today_start())).all())
+
+    @app.get("/partials/reminders", response_class=HTMLResponse)
+    async def reminders(session: Session = Depends(get_session)):
+        return ui._render_reminders(session.exec(select(Reminder)).all())
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    return app
+
+def async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(ui.router)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    return app
+
+def seed(rows: int):
+    init_db()
+    with Session(get_engine()) as session:
+        if session.exec(select(FoodLog).limit(1)).first():
+            return
+        now = datetime.now()
+        for i in range(rows):
+            session.add(FoodLog(description=f"meal {i}", meal_type="snack", logged_at=now))
+            session.add(TrainingLog(activity=f"run {i}", duration_minutes=30, logged_at=now))
+            session.add(MentalLog(content=f"note {i}", logged_at=now))
+            if i % 10 == 0:
+                session.add(Reminder(text=f"reminder {i}"))
+        session.commit()
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+async def run(app: FastAPI, concurrency: int, rounds: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    partial_ms, health_ms = [], []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def timed(path, sink):
+            start = clock.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            sink.append(clock.perf_counter() - start)
+
+        for _ in range(rounds):
+            jobs = [timed(PARTIALS[i % len(PARTIALS)], partial_ms) for i in range(concurrency)]
+            jobs += [timed("/health", health_ms) for _ in range(4)]
+            await asyncio.gather(*jobs)
+    return {
+        "partials p50": pct(partial_ms, 0.50),
+        "partials p99": pct(partial_ms, 0.99),
+        "health p50": pct(health_ms, 0.50),
+        "health p99": pct(health_ms, 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.rows} rows per table, {args.concurrency} concurrent partial loads x {args.rounds} rounds (ms)")
+    for label, factory in (("before (sync Session on loop)", blocking_app), ("after (async reader)", async_app)):
+        result = asyncio.run(run(factory(), args.concurrency, args.rounds))
+        print(f"  {label:32} " + "  ".join(f"{k} {v:8.1f}" for k, v in result.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Render throughput of the today-list fragments at 10 / 1k / 10k rows.
+
+Compares the old nested f-string renderer with the precompiled Jinja macros in
+app/templates/partials/today.html, both with an empty fragment cache (every
+row rendered) and a warm one (every row reused).
+
+    python scripts/bench_render.py [--sizes 10,1000,10000] [--seconds 0.5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from app import fragments
+from app.config import settings
+from app.routers.ui import _render_rows
+
+def fstring_rows(items):
+    """The pre-Jinja renderer, kept here only as the baseline (no escaping)."""
+    return "".join(f'<li class="text-sm text-slate-300 py-1 border-b border-slate-700">{i.description}{" · <span class=\'text-slate-500\'>" + i.meal_type + "</span>" if i.meal_type else ""}</li>' for i in items)
+
+def make_rows(n: int):
+    meals = ["breakfast", "lunch", "dinner", None]
+    return [SimpleNamespace(id=i, description=f"meal number {i} & sides", meal_type=meals[i % 4]) for i in range(n)]
+
+def rate(fn, seconds: float, before=None) -> float:
+    """Calls per second of fn(), running before() untimed ahead of each call"""
+    calls, spent = 0, 0.0
+    while spent < seconds:
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        spent += time.perf_counter() - start
+        calls += 1
+    return calls / spent
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,1000,10000")
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    settings.fragment_cache_size = max(settings.fragment_cache_size, max(sizes))
+    print(f"{'rows':>7}  {'f-string':>14}  {'jinja, cold':>14}  {'jinja, cached':>14}   (rows/s)")
+    for n in sizes:
+        items = make_rows(n)
+        baseline = rate(lambda: fstring_rows(items), args.seconds)
+        cold = rate(lambda: _render_rows("food", items), args.seconds, before=fragments.clear)
+        _render_rows("food", items)
+        warm = rate(lambda: _render_rows("food", items), args.seconds)
+        print(f"{n:>7}  {baseline * n:>14,.0f}  {cold * n:>14,.0f}  {warm * n:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Timings for refreshing a suggestion category of 10 / 1k / 10k rows.
+
+Compares the old per-object ORM clear (load every row, delete one by one) and
+bulk insert (session.add per row, no ids) with the single-statement DELETE
+and content-hash upsert (INSERT ... ON CONFLICT DO UPDATE ... RETURNING) the
+routers use now, and with the combined replace-category transaction.
+
+    python scripts/bench_suggestions.py [--sizes 10,1000,10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlmodel import Session, select
+from app.database import get_engine, init_db
+from app.models import Suggestion
+from app.routers.suggestions import clear_category, insert_suggestions
+
+CATEGORY = "bench"
+
+def make_rows(n: int):
+    return [{"category": CATEGORY, "content": f"suggestion number {i}", "priority": i % 5} for i in range(n)]
+
+def old_insert(session: Session, rows):
+    for row in rows:
+        session.add(Suggestion(**row))
+    session.commit()
+
+def old_clear(session: Session):
+    for suggestion in session.exec(select(Suggestion).where(Suggestion.category == CATEGORY)).all():
+        session.delete(suggestion)
+    session.commit()
+
+def new_insert(session: Session, rows):
+    insert_suggestions(session, rows)
+    session.commit()
+
+def new_clear(session: Session):
+    clear_category(session, CATEGORY)
+    session.commit()
+
+def replace(session: Session, rows):
+    clear_category(session, CATEGORY)
+    insert_suggestions(session, rows)
+    session.commit()
+
+def timed(fn, *args) -> float:
+    with Session(get_engine()) as session:
+        start = time.perf_counter()
+        fn(session, *args)
+        return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,1000,10000")
+    args = parser.parse_args()
+
+    init_db()
+    print(f"{'rows':>6}  {'old insert':>10}  {'old clear':>10}  {'new insert':>10}  {'new clear':>10}  {'replace':>10}   (ms)")
+    for n in (int(s) for s in args.sizes.split(",")):
+        rows = make_rows(n)
+        old = timed(old_insert, rows), timed(old_clear)
+        new = timed(new_insert, rows), timed(new_clear)
+        timed(new_insert, rows)
+        swap = timed(replace, rows)
+        timed(new_clear)
+        print(f"{n:>6}  {old[0]:>10.1f}  {old[1]:>10.1f}  {new[0]:>10.1f}  {new[1]:>10.1f}  {swap:>10.1f}")
+
+if __name__ == "__main__":
+    main()
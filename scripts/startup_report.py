@@ -0,0 +1,82 @@
+"""Cold-start report: import cost of app.main and time to the first /health 200.
+
+    python scripts/startup_report.py [--top 15] [--runs 3]
+
+Boots uvicorn against a throwaway database twice per run: once on an empty
+file (schema gets created) and once on the file the first boot left behind
+(schema fingerprint fast path), polling /health until it answers.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(top: int):
+    """Parse `python -X importtime` output into (cumulative µs, module) pairs."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main, sys; print(sorted(m for m in sys.modules if m.startswith('google')))"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "DATABASE_PATH": os.path.join(tempfile.mkdtemp(), "life.db")},
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        rows.append((int(cumulative_us), module))
+    total = next((us for us, module in rows if module.strip() == "app.main"), None)
+    return total, sorted(rows, reverse=True)[:top], result.stdout.strip()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_to_health(database_path: str) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env={**os.environ, "DATABASE_PATH": database_path},
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                if proc.poll() is not None:
+                    raise RuntimeError("uvicorn exited before /health answered")
+                time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    total, rows, google_modules = import_times(args.top)
+    print(f"import app.main: {total / 1000 if total else float('nan'):.1f} ms cumulative")
+    print(f"google modules loaded at import: {google_modules}")
+    for us, module in rows:
+        print(f"  {us / 1000:8.1f} ms  {module.strip()}")
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        path = os.path.join(tempfile.mkdtemp(), "life.db")
+        cold.append(time_to_health(path))
+        warm.append(time_to_health(path))
+    print(f"time to first /health 200, empty database:    {min(cold) * 1000:7.1f} ms (best of {args.runs})")
+    print(f"time to first /health 200, existing database: {min(warm) * 1000:7.1f} ms (best of {args.runs})")
+
+if __name__ == "__main__":
+    main()